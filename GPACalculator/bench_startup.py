@@ -0,0 +1,92 @@
+# bench_startup.py
+# Startup time of the GPA calculator.
+# Every run starts a fresh python process that imports gpacalculator, opens
+# the window and closes it again as soon as it is drawn.
+#  cold: empty icon cache, the icons are rendered with Pillow
+#  warm: the icon atlas is already cached, the normal case
+# It also shows whether Pillow and numpy were imported.
+#
+# usage:
+#   python bench_startup.py
+#   python bench_startup.py --runs 20
+#   python bench_startup.py --import-only     (no display needed)
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# runs in the child process, argv: cache directory, import only (0/1)
+CHILD = """
+import sys, time
+start = time.perf_counter()
+import icon_cache
+icon_cache.CACHE_DIR = sys.argv[1]
+import gpacalculator
+imported = time.perf_counter()
+if sys.argv[2] == "0":
+    app = gpacalculator.GPACalculatorApp()
+    app.update()
+    app.destroy()
+shown = time.perf_counter()
+print(imported - start, shown - start, "PIL" in sys.modules, "numpy" in sys.modules)
+"""
+
+
+# one startup, returns (process, import, window) seconds and the modules used
+def run_once(cache_dir, import_only):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", CHILD, cache_dir, "1" if import_only else "0"],
+                            cwd=HERE, capture_output=True, text=True)
+    total = time.perf_counter() - start
+    if result.returncode:
+        sys.exit(result.stderr.strip())
+    imported, shown, pil, numpy = result.stdout.split()
+    return total, float(imported), float(shown), pil == "True", numpy == "True"
+
+
+def report(label, runs):
+    totals = [r[0] for r in runs]
+    imports = [r[1] for r in runs]
+    shown = [r[2] for r in runs]
+    modules = [name for name, used in (("Pillow", runs[-1][3]), ("numpy", runs[-1][4])) if used]
+    print(f"{label:6}  process {statistics.median(totals) * 1000:7.1f} ms"
+          f"  import {statistics.median(imports) * 1000:7.1f} ms"
+          f"  to window {statistics.median(shown) * 1000:7.1f} ms"
+          f"  (median of {len(runs)}, loaded: {', '.join(modules) or 'neither'})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the startup of the GPA calculator.")
+    parser.add_argument("--runs", type=int, default=10, help="startups per case (default: 10)")
+    parser.add_argument("--import-only", action="store_true", help="only import, do not open the window")
+    args = parser.parse_args(argv)
+
+    base = tempfile.mkdtemp(prefix="gpa-bench-")
+    try:
+        if args.import_only:
+            # the icons are loaded with the window, the cache makes no difference
+            report("import", [run_once(base, True) for _ in range(args.runs)])
+            return 0
+        cold = []
+        for i in range(args.runs):
+            cold.append(run_once(os.path.join(base, f"cold{i}"), False))
+        warm_dir = os.path.join(base, "warm")
+        # fills the cache
+        run_once(warm_dir, False)
+        warm = [run_once(warm_dir, False) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+    report("cold", cold)
+    report("warm", warm)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
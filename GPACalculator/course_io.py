@@ -0,0 +1,109 @@
+# course_io.py
+# Reading and writing course files for the GPA calculator, one record at a
+# time, so the size of a file never matters for memory.
+#  .jsonl  one JSON object per line: {"name": ..., "credits": ..., "grade": ...}
+#  .csv    a header line with name, credits, grade and one course per line
+#  .json   the old format, one JSON array; it has to be read in one piece
+# A bad record only costs that record: read_courses() reports it with its
+# line number and goes on with the next one. That includes a .jsonl line
+# that is not valid UTF-8; in .csv and .json files such bytes are replaced.
+# Negative credits are kept, the editor allows them and they do not count
+# towards the GPA.
+
+import csv
+import json
+import math
+
+from grades import GRADE_POINTS
+
+FIELDS = ("name", "credits", "grade")
+
+
+# file format for a path, by its extension
+def file_format(path):
+    lowered = path.lower()
+    if lowered.endswith(".csv"):
+        return "csv"
+    if lowered.endswith(".json"):
+        return "json"
+    return "jsonl"
+
+
+# (name, credits, grade) of a record, missing fields get the defaults
+# raises ValueError for values that cannot be used
+def parse_course(item):
+    if not isinstance(item, dict):
+        raise ValueError("not an object")
+    name = str(item.get("name") or "")
+    try:
+        credits = float(item.get("credits") or 0.0)
+    except (TypeError, ValueError):
+        raise ValueError(f"bad credits: {item.get('credits')!r}")
+    if not math.isfinite(credits):
+        raise ValueError(f"bad credits: {credits}")
+    grade = str(item.get("grade") or "A").strip().upper()
+    if grade not in GRADE_POINTS:
+        raise ValueError(f"unknown grade: {item.get('grade')!r}")
+    return name, credits, grade
+
+
+# yields (line number, (name, credits, grade) or None, error or None) for
+# every record of the file at path
+def read_courses(path):
+    fmt = file_format(path)
+    # read as bytes, so one bad byte cannot end the whole file
+    with open(path, "rb") as f:
+        if fmt == "json":
+            for number, item in enumerate(json.loads(f.read().decode("utf-8", "replace")), 1):
+                yield checked(number, item)
+        elif fmt == "csv":
+            reader = csv.DictReader(raw.decode("utf-8", "replace") for raw in f)
+            for item in reader:
+                yield checked(reader.line_num, item)
+        else:
+            for number, raw in enumerate(f, 1):
+                try:
+                    line = raw.decode("utf-8")
+                except UnicodeDecodeError:
+                    yield number, None, "not valid UTF-8"
+                    continue
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                except ValueError as e:
+                    yield number, None, f"not valid JSON ({e.msg})"
+                    continue
+                yield checked(number, item)
+
+
+def checked(number, item):
+    try:
+        return number, parse_course(item), None
+    except ValueError as e:
+        return number, None, str(e)
+
+
+# writes the course records (dicts) to path one by one
+# returns the number of courses written
+def write_courses(records, path):
+    fmt = file_format(path)
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            for record in records:
+                writer.writerow(record)
+                count += 1
+        elif fmt == "json":
+            f.write("[")
+            for record in records:
+                f.write(("," if count else "") + "\n  " + json.dumps(record))
+                count += 1
+            f.write("\n]\n")
+        else:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+                count += 1
+    return count
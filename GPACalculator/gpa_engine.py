@@ -0,0 +1,195 @@
+# gpa_engine.py
+# GPA math without any GUI, shared by the GPA calculator window and the
+# command line below.
+# Grades are turned into small integer codes, so the grade points of a whole
+# column are one array lookup, and the GPAs of many students (or terms) are
+# grouped sums with numpy.bincount instead of python loops.
+#
+# usage:
+#   python gpa_engine.py transcripts.csv -o gpas.csv
+#   python gpa_engine.py transcripts.jsonl --by term -o gpas.jsonl
+#
+# The transcript needs the columns (or JSON keys) student, credits and grade,
+# and term for --by term. It is read CHUNK_ROWS rows at a time, so only the
+# totals per student stay in memory, not the transcript.
+
+import argparse
+import csv
+import itertools
+import json
+import math
+import sys
+
+import numpy as np
+
+from grades import GRADE_POINTS
+
+# grade code -> grade points, code len(GRADE_POINTS) is an unknown grade
+GRADE_CODES = {grade: code for code, grade in enumerate(GRADE_POINTS)}
+POINTS_TABLE = np.array(list(GRADE_POINTS.values()) + [0.0])
+UNKNOWN = len(GRADE_POINTS)
+
+# transcript rows read at a time
+CHUNK_ROWS = 100_000
+
+
+# grade codes of a sequence of grade strings
+# only the distinct grades are looked up one by one
+def grade_codes(grades):
+    grades = np.asarray(grades, dtype=str)
+    distinct, inverse = np.unique(grades, return_inverse=True)
+    lookup = np.array([GRADE_CODES.get(g.strip().upper(), UNKNOWN) for g in distinct], dtype=np.uint8)
+    return lookup[inverse]
+
+
+# (points, credits) arrays that count towards the GPA: courses with no
+# credits or an unknown grade count as zero
+def weighted(credits, codes):
+    credits = np.asarray(credits, dtype=float)
+    codes = np.asarray(codes)
+    counted = (credits > 0) & (codes < UNKNOWN)
+    credits = np.where(counted, credits, 0.0)
+    return POINTS_TABLE[np.minimum(codes, UNKNOWN)] * credits, credits
+
+
+# GPA of one list of courses, returns (gpa, total points, total credits)
+def gpa(credits, codes):
+    points, credits = weighted(credits, codes)
+    total_points = float(points.sum())
+    total_credits = float(credits.sum())
+    return (total_points / total_credits if total_credits else 0.0), total_points, total_credits
+
+
+# GPA per group, e.g. per student
+# returns (group keys, gpas, points, credits) arrays
+def grouped_gpa(keys, credits, codes):
+    points, credits = weighted(credits, codes)
+    groups, inverse = np.unique(np.asarray(keys, dtype=str), return_inverse=True)
+    total_points = np.bincount(inverse, weights=points, minlength=len(groups))
+    total_credits = np.bincount(inverse, weights=credits, minlength=len(groups))
+    return groups, ratio(total_points, total_credits), total_points, total_credits
+
+
+# points / credits, 0 where there are no credits
+def ratio(points, credits):
+    return np.divide(points, credits, out=np.zeros_like(points), where=credits > 0)
+
+
+# running totals per group over any number of chunks
+class GPATotals:
+    def __init__(self):
+        self.slots = {}
+        self.points = np.zeros(1024)
+        self.credits = np.zeros(1024)
+
+    def add(self, keys, credits, codes):
+        points, credits = weighted(credits, codes)
+        groups, inverse = np.unique(np.asarray(keys, dtype=str), return_inverse=True)
+        # only the distinct keys of the chunk go through the dict
+        slots = np.array([self.slots.setdefault(key, len(self.slots)) for key in groups.tolist()], dtype=np.intp)
+        if len(self.slots) > len(self.points):
+            grow = np.zeros(max(len(self.slots), 2 * len(self.points)) - len(self.points))
+            self.points = np.concatenate([self.points, grow])
+            self.credits = np.concatenate([self.credits, grow])
+        rows = slots[inverse]
+        self.points += np.bincount(rows, weights=points, minlength=len(self.points))
+        self.credits += np.bincount(rows, weights=credits, minlength=len(self.credits))
+
+    # (key, gpa, points, credits) for every group, in the order first seen
+    def results(self):
+        count = len(self.slots)
+        gpas = ratio(self.points[:count], self.credits[:count])
+        for key, slot in self.slots.items():
+            yield key, float(gpas[slot]), float(self.points[slot]), float(self.credits[slot])
+
+
+# yields lists of transcript records (dicts), CHUNK_ROWS at a time
+def read_chunks(path, chunk_rows=CHUNK_ROWS):
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            records = (parse_line(line) for line in f if line.strip())
+        else:
+            records = csv.DictReader(f)
+        while True:
+            chunk = list(itertools.islice(records, chunk_rows))
+            if not chunk:
+                return
+            yield chunk
+
+
+# one JSON Lines record, None if the line is not valid JSON
+def parse_line(line):
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+# the columns of a chunk of records as arrays
+# records with missing or bad values, including negative, infinite or NaN
+# credits, are dropped, returns (columns, dropped)
+def columns(chunk, key_fields):
+    keys, credits, grades = [], [], []
+    dropped = 0
+    for record in chunk:
+        try:
+            key = "\t".join(str(record[field]) for field in key_fields)
+            value = float(record["credits"])
+            grade = str(record["grade"])
+        except (KeyError, TypeError, ValueError):
+            dropped += 1
+            continue
+        if not math.isfinite(value) or value < 0:
+            dropped += 1
+            continue
+        keys.append(key)
+        credits.append(value)
+        grades.append(grade)
+    return (keys, np.array(credits), grade_codes(grades) if grades else np.zeros(0, np.uint8)), dropped
+
+
+# writes (key, gpa, points, credits) results as CSV or JSON Lines
+def write_results(results, key_fields, out):
+    jsonl = getattr(out, "name", "").lower().endswith((".jsonl", ".ndjson"))
+    writer = None if jsonl else csv.writer(out)
+    if writer:
+        writer.writerow(list(key_fields) + ["gpa", "points", "credits"])
+    for key, value, points, credits in results:
+        parts = key.split("\t")
+        if writer:
+            writer.writerow(parts + [f"{value:.3f}", f"{points:g}", f"{credits:g}"])
+        else:
+            record = dict(zip(key_fields, parts), gpa=round(value, 3), points=points, credits=credits)
+            out.write(json.dumps(record) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute GPAs from a CSV or JSON Lines transcript.")
+    parser.add_argument("transcript", help="CSV or .jsonl file with student, credits, grade (and term) fields")
+    parser.add_argument("--by", choices=("student", "term"), default="student",
+                        help="one GPA per student, or per student and term (default: student)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="rows read at a time")
+    parser.add_argument("-o", "--output", help="CSV or .jsonl file to write (default: stdout as CSV)")
+    args = parser.parse_args(argv)
+
+    key_fields = ("student",) if args.by == "student" else ("student", "term")
+    totals = GPATotals()
+    rows = dropped = 0
+    for chunk in read_chunks(args.transcript, args.chunk_rows):
+        (keys, credits, codes), bad = columns(chunk, key_fields)
+        rows += len(chunk)
+        dropped += bad
+        if keys:
+            totals.add(keys, credits, codes)
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as out:
+            write_results(totals.results(), key_fields, out)
+    else:
+        write_results(totals.results(), key_fields, sys.stdout)
+    print(f"{rows} rows, {len(totals.slots)} groups, {dropped} bad rows skipped", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,71 +2,127 @@
 # A simple GUI GPA calculator with icon buttons.
 # Place optional icon files in an "icons" subfolder (add.png, remove.png, calculate.png, save.png, load.png).
 # Requires Pillow (optional) for better image support: pip install pillow
+# Pillow is only needed the first time, the icons are cached, see icon_cache.py.
+# The GPA math is in gpa_engine.py (needs numpy), which also has a command
+# line for whole transcript files. It is imported on the first Calculate.
 
 
-import json
-import os
-import sys
+import itertools
+import math
+from array import array
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from PIL import Image, ImageTk, ImageDraw, ImageFont
-
-try:
-    PIL_AVAILABLE = True
-except Exception:
-    PIL_AVAILABLE = False
-
-GRADE_POINTS = {
-    "A": 4.0,
-    "B": 3.0,
-    "C": 2.0,
-    "D": 1.0,
-    "F": 0.0
-}
-GRADE_OPTIONS = list(GRADE_POINTS.keys())
-DEFAULT_CREDIT_OPTIONS = [0.5, 1.0, 1.5, 2.0, 3.0, 4.0, 5.0]
 
+import course_io
+import icon_cache
+from grades import GRADE_POINTS
 
-def resource_path(rel_path):
-    # For bundling; otherwise returns path relative to script
-    base = getattr(sys, "_MEIPASS", os.path.abspath("."))
-    return os.path.join(base, rel_path)
-
+# the grade indexes in CourseModel are the engine's grade codes
+GRADE_OPTIONS = list(GRADE_POINTS.keys())
+DEFAULT_CREDIT_OPTIONS = [0.5, 1.0, 1.5, 2.0, 3.0, 4.0, 5.0]
 
-def load_icon(path, size=(24, 24), fallback_text=None, bg="#ddd"):
-    path = resource_path(path)
-    if PIL_AVAILABLE and os.path.exists(path):
-        try:
-            img = Image.open(path).convert("RGBA")
-            img = img.resize(size, Image.LANCZOS)
-            return ImageTk.PhotoImage(img)
-        except Exception:
-            pass
-    # Fallback: draw a simple icon with text or colored box
-    if PIL_AVAILABLE:
-        img = Image.new("RGBA", size, bg)
-        draw = ImageDraw.Draw(img)
-        if fallback_text:
-            try:
-                # try to use a default font
-                f = ImageFont.load_default()
-                w, h = draw.textsize(fallback_text, font=f)
-                draw.text(((size[0]-w)/2, (size[1]-h)/2), fallback_text, fill="black", font=f)
-            except Exception:
-                pass
-        return ImageTk.PhotoImage(img)
-    else:
-        # tkinter native PhotoImage fallback (small colored square)
-        img = tk.PhotoImage(width=size[0], height=size[1])
-        # fill with bg color
-        img.put(("{}".format(bg),), to=(0, 0, size[0], size[1]))
-        return img
+# course file types for the save and load dialogs, see course_io.py
+COURSE_FILETYPES = [("JSON Lines files", "*.jsonl"), ("CSV files", "*.csv"),
+                    ("JSON files", "*.json"), ("All files", "*.*")]
+# courses added to the table per step of a load
+LOAD_BATCH = 2000
+
+# the running GPA totals count credits in thousandths and grade points in
+# hundredths, as integers
+CREDIT_UNITS = 1000
+POINT_UNITS = 100
+GRADE_UNITS = [round(GRADE_POINTS[grade] * POINT_UNITS) for grade in GRADE_OPTIONS]
+
+
+class CourseModel:
+    # Compact backing store for the course table: one list of names and two
+    # flat arrays for credits and grade indexes, so thousands of courses cost
+    # a few bytes each instead of a row of widgets.
+    # The GPA totals are kept up to date on every change, as integers in
+    # CREDIT_UNITS and POINT_UNITS, so adding and taking away values many
+    # times never drifts and costs about as much as float math.
+    def __init__(self):
+        self.names = []
+        self.credits = array("d")
+        self.grades = array("B")
+        self.total_points = 0
+        self.total_credits = 0
+
+    def __len__(self):
+        return len(self.names)
+
+    # (points, credits) a course with these credits and grade index adds to
+    # the totals; round() raises for inf and nan
+    def contribution(self, credits, grade):
+        if credits <= 0.0:
+            return 0, 0
+        credits = round(credits * CREDIT_UNITS)
+        return credits * GRADE_UNITS[grade], credits
+
+    def count(self, contribution, sign):
+        points, credits = contribution
+        self.total_points += sign * points
+        self.total_credits += sign * credits
+
+    def gpa(self):
+        if not self.total_credits:
+            return 0.0
+        return self.total_points / (self.total_credits * POINT_UNITS)
+
+    def credits_total(self):
+        return self.total_credits / CREDIT_UNITS
+
+    # the new contribution is worked out before anything changes, so a bad
+    # value raises without leaving the totals out of step with the courses
+    def append(self, name="", credits=3.0, grade="A"):
+        grade = GRADE_OPTIONS.index(grade)
+        new = self.contribution(credits, grade)
+        self.names.append(name)
+        self.credits.append(credits)
+        self.grades.append(grade)
+        self.count(new, 1)
+
+    def get(self, index):
+        return {"name": self.names[index], "credits": self.credits[index],
+                "grade": GRADE_OPTIONS[self.grades[index]]}
+
+    def set(self, index, name=None, credits=None, grade=None):
+        credits = self.credits[index] if credits is None else credits
+        grade = self.grades[index] if grade is None else GRADE_OPTIONS.index(grade)
+        new = self.contribution(credits, grade)
+        self.count(self.contribution(self.credits[index], self.grades[index]), -1)
+        if name is not None:
+            self.names[index] = name
+        self.credits[index] = credits
+        self.grades[index] = grade
+        self.count(new, 1)
+
+    def remove(self, index):
+        self.count(self.contribution(self.credits[index], self.grades[index]), -1)
+        del self.names[index]
+        del self.credits[index]
+        del self.grades[index]
+
+    def clear(self):
+        self.names = []
+        self.credits = array("d")
+        self.grades = array("B")
+        self.total_points = 0
+        self.total_credits = 0
+
+    def records(self):
+        for index in range(len(self.names)):
+            yield self.get(index)
 
 
 class CourseRow:
+    # One row of widgets in the table. Only as many rows as fit on screen
+    # exist; scrolling binds them to other courses of the model.
     def __init__(self, parent, app, row_index):
         self.parent = parent
         self.app = app
+        self.index = row_index
+        self.binding = False
         self.frame = ttk.Frame(parent)
         self.course_var = tk.StringVar()
         self.credit_var = tk.DoubleVar(value=3.0)
@@ -86,9 +142,28 @@ class CourseRow:
         self.combo_grade.grid(row=0, column=2, padx=(0, 6))
         self.btn_remove.grid(row=0, column=3)
 
+        # edits are written straight back into the model
+        for var in (self.course_var, self.credit_var, self.grade_var):
+            var.trace_add("write", self.on_edit)
+
     def grid(self, **kwargs):
         self.frame.grid(**kwargs)
 
+    # shows the course at index of the model in this row
+    def bind_to(self, index):
+        self.index = index
+        data = self.app.model.get(index)
+        self.binding = True
+        self.course_var.set(data["name"])
+        self.credit_var.set(data["credits"])
+        self.grade_var.set(data["grade"])
+        self.binding = False
+
+    def on_edit(self, *args):
+        if not self.binding and self.index < len(self.app.model):
+            self.app.model.set(self.index, **self.get_data())
+            self.app.show_totals()
+
     def remove(self):
         self.app.remove_row(self)
 
@@ -98,6 +173,9 @@ class CourseRow:
             credits = float(self.credit_var.get())
         except Exception:
             credits = 0.0
+        # the Spinbox takes "inf" and "nan" too
+        if not math.isfinite(credits):
+            credits = 0.0
         grade = self.grade_var.get()
         return {"name": name, "credits": credits, "grade": grade}
 
@@ -119,13 +197,20 @@ class GPACalculatorApp(tk.Tk):
             pass
 
         # Load icons (optional)
-        self.icon_add = load_icon("icons/add.png", (20, 20), fallback_text="+", bg="#aaf")
-        self.icon_remove = load_icon("icons/remove.png", (18, 18), fallback_text="-", bg="#faa")
-        self.icon_calc = load_icon("icons/calculate.png", (20, 20), fallback_text="=", bg="#afa")
-        self.icon_save = load_icon("icons/save.png", (20, 20), fallback_text="S", bg="#ffd")
-        self.icon_load = load_icon("icons/load.png", (20, 20), fallback_text="L", bg="#ddf")
-
+        icons = icon_cache.load_icons(self)
+        self.icon_add = icons["add"]
+        self.icon_remove = icons["remove"]
+        self.icon_calc = icons["calculate"]
+        self.icon_save = icons["save"]
+        self.icon_load = icons["load"]
+
+        # courses live in the model, self.rows are the visible widgets
+        self.model = CourseModel()
         self.rows = []
+        self.first = 0
+        self.row_height = None
+        # the reader of the load in progress, if any
+        self.loading = None
         self.build_ui()
         # Start with 4 rows
         for _ in range(4):
@@ -152,9 +237,19 @@ class GPACalculatorApp(tk.Tk):
         ttk.Label(hdr, text="Course", width=40).grid(row=0, column=0, sticky="w")
         ttk.Label(hdr, text="Credits", width=8).grid(row=0, column=1)
         ttk.Label(hdr, text="Grade", width=8).grid(row=0, column=2)
-        # container for rows
-        self.rows_container = ttk.Frame(self)
-        self.rows_container.pack(fill="both", expand=True, padx=12, pady=8)
+        # container for rows, with a scrollbar over the whole model
+        table = ttk.Frame(self)
+        table.pack(fill="both", expand=True, padx=12, pady=8)
+        self.scrollbar = ttk.Scrollbar(table, orient="vertical", command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        # the container keeps its own size, the rows in it follow that size
+        self.rows_container = ttk.Frame(table, height=300)
+        self.rows_container.grid_propagate(False)
+        self.rows_container.pack(side="left", fill="both", expand=True)
+        self.rows_container.bind("<Configure>", lambda e: self.refresh_rows())
+        self.bind("<MouseWheel>", lambda e: self.scroll_to(self.first + (-3 if e.delta > 0 else 3)))
+        self.bind("<Button-4>", lambda e: self.scroll_to(self.first - 3))
+        self.bind("<Button-5>", lambda e: self.scroll_to(self.first + 3))
 
         bottom = ttk.Frame(self)
         bottom.pack(fill="x", padx=12, pady=(0, 12))
@@ -165,45 +260,85 @@ class GPACalculatorApp(tk.Tk):
         self.bind("<Return>", lambda e: self.calculate_gpa())
 
     def add_row(self, at_end=True):
-        row = CourseRow(self.rows_container, self, len(self.rows))
-        self.rows.append(row)
-        self.refresh_rows()
+        self.model.append()
+        self.show_totals()
+        # scroll so the new course is visible
+        self.scroll_to(len(self.model))
 
     def remove_row(self, row_obj):
-        if row_obj in self.rows:
-            if len(self.rows) == 1:
+        if row_obj in self.rows and row_obj.index < len(self.model):
+            if len(self.model) == 1:
                 messagebox.showinfo("Notice", "At least one course must remain.")
                 return
-            row_obj.destroy()
-            self.rows.remove(row_obj)
+            self.model.remove(row_obj.index)
+            self.show_totals()
             self.refresh_rows()
 
+    # live GPA from the running totals of the model
+    def show_totals(self):
+        self.lbl_result.config(text=f"GPA: {self.model.gpa():.3f} ({self.model.credits_total():.2f} credits)")
+
+    # number of rows that fit in the container
+    def visible_count(self):
+        if self.row_height is None:
+            probe = CourseRow(self.rows_container, self, 0)
+            probe.frame.update_idletasks()
+            self.row_height = probe.frame.winfo_reqheight() + 8
+            probe.destroy()
+        return max(1, self.rows_container.winfo_height() // self.row_height)
+
+    # makes the pool of row widgets match the container height and shows
+    # the model from self.first on; costs the same for any number of courses
     def refresh_rows(self):
+        count = self.visible_count()
+        while len(self.rows) < count:
+            row = CourseRow(self.rows_container, self, len(self.rows))
+            row.grid(row=len(self.rows), column=0, pady=4, sticky="w")
+            self.rows.append(row)
+        while len(self.rows) > count:
+            self.rows.pop().destroy()
+        self.first = max(0, min(self.first, len(self.model) - count))
         for i, row in enumerate(self.rows):
-            row.grid(row=i, column=0, pady=4, sticky="w")
-        # update window
-        self.update_idletasks()
+            index = self.first + i
+            if index < len(self.model):
+                row.bind_to(index)
+                row.frame.grid()
+            else:
+                row.index = index
+                row.frame.grid_remove()
+        total = max(1, len(self.model))
+        self.scrollbar.set(self.first / total, min(1.0, (self.first + count) / total))
+
+    def scroll_to(self, first):
+        self.first = first
+        self.refresh_rows()
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.model)))
+        elif unit == "pages":
+            self.scroll_to(self.first + int(amount) * len(self.rows))
+        else:
+            self.scroll_to(self.first + int(amount))
 
     def calculate_gpa(self):
-        total_points = 0.0
-        total_credits = 0.0
+        # numpy takes longer to import than the window takes to open, and
+        # without numpy the running totals of the model give the same GPA
+        try:
+            import gpa_engine
+        except ImportError:
+            gpa, total_credits = self.model.gpa(), self.model.credits_total()
+        else:
+            gpa, total_points, total_credits = gpa_engine.gpa(self.model.credits, self.model.grades)
+        # the summary only lists the first 20 counted courses
         details = []
-        for row in self.rows:
-            data = row.get_data()
+        for data in self.model.records():
+            if len(details) == 20:
+                break
             credits = data["credits"]
             grade = data["grade"]
-            if credits <= 0.0:
-                continue
-            gp = GRADE_POINTS.get(grade, None)
-            if gp is None:
-                continue
-            total_points += gp * credits
-            total_credits += credits
-            details.append((data["name"], credits, grade, gp))
-        if total_credits == 0:
-            gpa = 0.0
-        else:
-            gpa = total_points / total_credits
+            if credits > 0.0:
+                details.append((data["name"], credits, grade, GRADE_POINTS[grade]))
         self.lbl_result.config(text=f"GPA: {gpa:.3f} ({total_credits:.2f} credits)")
         # optional: show breakdown dialog
         detail_lines = []
@@ -215,51 +350,61 @@ class GPACalculatorApp(tk.Tk):
             messagebox.showinfo("Calculation Summary", f"GPA: {gpa:.3f}\nCredits: {total_credits:.2f}\n\n" + "\n".join(detail_lines[:20]))
 
     def save_courses(self):
-        data = [row.get_data() for row in self.rows]
-        path = filedialog.asksaveasfilename(
-            defaultextension=".json", filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
-        )
+        path = filedialog.asksaveasfilename(defaultextension=".jsonl", filetypes=COURSE_FILETYPES)
         if not path:
             return
         try:
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
-            messagebox.showinfo("Saved", f"Saved {len(data)} courses to:\n{path}")
+            count = course_io.write_courses(self.model.records(), path)
+            messagebox.showinfo("Saved", f"Saved {count} courses to:\n{path}")
         except Exception as e:
             messagebox.showerror("Error", f"Could not save file:\n{e}")
 
+    # reads the file LOAD_BATCH courses at a time from the Tk loop, so the
+    # window stays responsive and only the model grows in memory
+    # the courses go into a new model, which only replaces the table once
+    # the whole file is read; a file that cannot be read changes nothing
     def load_courses(self):
-        path = filedialog.askopenfilename(
-            defaultextension=".json", filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
-        )
+        path = filedialog.askopenfilename(defaultextension=".jsonl", filetypes=COURSE_FILETYPES)
         if not path:
             return
+        self.loading = course_io.read_courses(path)
+        self.after(0, self.load_batch, self.loading, CourseModel(), path, [])
+
+    # errors keeps the first few bad lines for the message, skipped counts them all
+    def load_batch(self, reader, model, path, errors, skipped=0):
+        # a newer load replaced this one
+        if reader is not self.loading:
+            reader.close()
+            return
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            # validate and populate
-            for row in self.rows:
-                row.destroy()
-            self.rows.clear()
-            for item in data:
-                row = CourseRow(self.rows_container, self, len(self.rows))
-                row.course_var.set(item.get("name", ""))
-                try:
-                    row.credit_var.set(float(item.get("credits", 0.0)))
-                except Exception:
-                    row.credit_var.set(0.0)
-                grade = item.get("grade", "A")
-                if grade not in GRADE_OPTIONS:
-                    grade = "A"
-                row.grade_var.set(grade)
-                self.rows.append(row)
-            if not self.rows:
-                self.add_row()
-            self.refresh_rows()
-            messagebox.showinfo("Loaded", f"Loaded {len(self.rows)} courses from:\n{path}")
+            batch = list(itertools.islice(reader, LOAD_BATCH))
         except Exception as e:
+            self.loading = None
+            self.show_totals()
+            self.refresh_rows()
             messagebox.showerror("Error", f"Could not load file:\n{e}")
-
+            return
+        for line, course, error in batch:
+            if error:
+                skipped += 1
+                if len(errors) < 10:
+                    errors.append(f"line {line}: {error}")
+            else:
+                model.append(*course)
+        if len(batch) == LOAD_BATCH:
+            self.lbl_result.config(text=f"Loading... {len(model)} courses")
+            self.after(1, self.load_batch, reader, model, path, errors, skipped)
+            return
+        self.loading = None
+        if not len(model):
+            model.append()
+        self.model = model
+        self.show_totals()
+        self.scroll_to(0)
+        message = f"Loaded {len(self.model)} courses from:\n{path}"
+        if skipped:
+            message += f"\n\n{skipped} bad records skipped:\n" + "\n".join(errors)
+        messagebox.showinfo("Loaded", message)
 
 if __name__ == "__main__":
     app = GPACalculatorApp()
@@ -0,0 +1,12 @@
+# grades.py
+# The grade scale, shared by the GPA calculator window, course_io.py and
+# gpa_engine.py. It is kept out of gpa_engine.py so the window can start
+# without importing numpy.
+
+GRADE_POINTS = {
+    "A": 4.0,
+    "B": 3.0,
+    "C": 2.0,
+    "D": 1.0,
+    "F": 0.0
+}
@@ -0,0 +1,147 @@
+# icon_cache.py
+# Button icons for the GPA calculator, rendered once and cached.
+# The first start (or the first one after an icon file changed) scales every
+# icon in ICONS to its button size with Pillow and writes them side by side
+# into one PNG atlas in CACHE_DIR. Every later start reads that atlas with
+# tk's own PhotoImage and cuts the icons out of it, so Pillow is not even
+# imported.
+# The atlas name is a hash of ICONS and the size and mtime of every icon
+# file, so a changed icon or size simply makes a new atlas.
+# Without Pillow the icons are plain colored squares.
+
+import hashlib
+import os
+import sys
+import tkinter as tk
+
+# where the atlas is kept
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "gpacalculator")
+
+# name -> (icon file, size, fallback text, fallback background)
+ICONS = {
+    "add": ("icons/add.png", (20, 20), "+", "#aaf"),
+    "remove": ("icons/remove.png", (18, 18), "-", "#faa"),
+    "calculate": ("icons/calculate.png", (20, 20), "=", "#afa"),
+    "save": ("icons/save.png", (20, 20), "S", "#ffd"),
+    "load": ("icons/load.png", (20, 20), "L", "#ddf"),
+}
+
+
+def resource_path(rel_path):
+    # For bundling; otherwise returns path relative to script
+    base = getattr(sys, "_MEIPASS", os.path.abspath("."))
+    return os.path.join(base, rel_path)
+
+
+# file name of the atlas for icons, changes whenever one of the files does
+def atlas_name(icons):
+    digest = hashlib.sha1()
+    for name, (path, size, text, bg) in icons.items():
+        try:
+            stat = os.stat(resource_path(path))
+            stamp = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            stamp = None
+        digest.update(repr((name, path, size, text, bg, stamp)).encode())
+    return f"icons-{digest.hexdigest()[:16]}.png"
+
+
+# x position of every icon in the atlas, they sit side by side
+def atlas_layout(icons):
+    layout = {}
+    x = 0
+    for name, (path, size, text, bg) in icons.items():
+        layout[name] = (x, size)
+        x += size[0]
+    return layout
+
+
+# one icon at its size as a Pillow image: the icon file, or a square with
+# the fallback text if the file is missing or broken
+def render_icon(path, size, text, bg):
+    from PIL import Image, ImageDraw, ImageFont
+
+    path = resource_path(path)
+    if os.path.exists(path):
+        try:
+            return Image.open(path).convert("RGBA").resize(size, Image.LANCZOS)
+        except Exception:
+            pass
+    img = Image.new("RGBA", size, bg)
+    if text:
+        draw = ImageDraw.Draw(img)
+        font = ImageFont.load_default()
+        left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+        draw.text(((size[0] - (right - left)) / 2 - left, (size[1] - (bottom - top)) / 2 - top),
+                  text, fill="black", font=font)
+    return img
+
+
+# renders all icons into one Pillow image
+def build_atlas(icons):
+    from PIL import Image
+
+    layout = atlas_layout(icons)
+    width = sum(spec[1][0] for spec in icons.values())
+    height = max(spec[1][1] for spec in icons.values())
+    atlas = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    for name, spec in icons.items():
+        atlas.paste(render_icon(*spec), (layout[name][0], 0))
+    return atlas
+
+
+# writes atlas to path through a temporary file and removes older atlases
+def save_atlas(atlas, path):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    temp = path + ".tmp"
+    atlas.save(temp, "PNG")
+    os.replace(temp, path)
+    for name in os.listdir(directory):
+        if name.startswith("icons-") and name.endswith(".png") and name != os.path.basename(path):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+# tk images for all icons, name -> PhotoImage
+# master is the Tk window the images belong to
+def load_icons(master, icons=ICONS, directory=None):
+    path = os.path.join(directory or CACHE_DIR, atlas_name(icons))
+    if os.path.exists(path):
+        try:
+            atlas = tk.PhotoImage(master=master, file=path)
+        except tk.TclError:
+            atlas = None
+    else:
+        atlas = None
+    if atlas is None:
+        try:
+            from PIL import ImageTk
+            image = build_atlas(icons)
+        except ImportError:
+            return fallback_icons(master, icons)
+        try:
+            save_atlas(image, path)
+        except OSError:
+            # no cache this time, the icons still work
+            pass
+        atlas = ImageTk.PhotoImage(image, master=master)
+    result = {}
+    for name, (x, size) in atlas_layout(icons).items():
+        icon = tk.PhotoImage(master=master, width=size[0], height=size[1])
+        icon.tk.call(icon, "copy", atlas, "-from", x, 0, x + size[0], size[1])
+        result[name] = icon
+    return result
+
+
+# tkinter native PhotoImage fallback (small colored squares)
+def fallback_icons(master, icons):
+    result = {}
+    for name, (path, size, text, bg) in icons.items():
+        img = tk.PhotoImage(master=master, width=size[0], height=size[1])
+        # fill with bg color
+        img.put(("{}".format(bg),), to=(0, 0, size[0], size[1]))
+        result[name] = img
+    return result
@@ -0,0 +1,137 @@
+# canvas.py
+# Tiled canvas for Paint.
+# The canvas is cut into TILE x TILE tiles, the same grid the stroke index
+# uses (see strokes.py). A tile is only allocated the first time something is
+# drawn on it, every other tile is plain white, so a 20000 x 20000 canvas
+# costs nothing until it is drawn on.
+# At most max_tiles tiles are kept as images. Beyond that the least recently
+# used ones are packed with zlib and unpacked again when they are needed,
+# which keeps the resident memory flat however much of the canvas is used.
+# Tiles that were never drawn on have the background color. It is white
+# until a fill reaches the untouched part of the canvas, see fill.py.
+
+import zlib
+from collections import OrderedDict
+
+from PyQt5.QtGui import QColor, QImage, QPainter
+from PyQt5.QtCore import QRect, Qt
+
+from strokes import TILE
+
+# default canvas size in pixels
+CANVAS_SIZE = (20000, 20000)
+
+# tiles kept unpacked, 256 KB each
+MAX_TILES = 512
+
+
+class TiledCanvas:
+    def __init__(self, width=CANVAS_SIZE[0], height=CANVAS_SIZE[1], max_tiles=MAX_TILES):
+        self.width = width
+        self.height = height
+        self.max_tiles = max_tiles
+        # (column, row) -> QImage, least recently used first
+        self.tiles = OrderedDict()
+        # (column, row) -> zlib packed pixels of the evicted tiles
+        self.packed = {}
+        # color of the tiles not allocated yet
+        self.background = QColor(Qt.white)
+
+    def rect(self):
+        return QRect(0, 0, self.width, self.height)
+
+    # rectangle of tile key in canvas pixels
+    def tile_rect(self, key):
+        return QRect(key[0] * TILE, key[1] * TILE, TILE, TILE)
+
+    # keys of the tiles inside rect
+    def keys(self, rect):
+        rect = rect.intersected(self.rect())
+        if rect.isEmpty():
+            return []
+        return [(column, row)
+                for row in range(rect.top() // TILE, rect.bottom() // TILE + 1)
+                for column in range(rect.left() // TILE, rect.right() // TILE + 1)]
+
+    # the image of tile key, or None if nothing was drawn there yet
+    # create=True allocates a tile of the background color instead
+    def tile(self, key, create=False):
+        image = self.tiles.get(key)
+        if image is not None:
+            self.tiles.move_to_end(key)
+            return image
+        data = self.packed.pop(key, None)
+        if data is not None:
+            image = QImage(zlib.decompress(data), TILE, TILE, QImage.Format_RGB32).copy()
+        elif create:
+            image = QImage(TILE, TILE, QImage.Format_RGB32)
+            image.fill(self.background)
+        else:
+            return None
+        self.tiles[key] = image
+        self.shrink()
+        return image
+
+    # calls draw(painter) on every tile in rect, the painter works in canvas
+    # pixels; clear=True makes the tiles white first
+    def draw(self, rect, draw, clear=False):
+        for key in self.keys(rect):
+            self.draw_tile(key, draw, clear)
+
+    # tiles outside the canvas are skipped
+    def draw_tile(self, key, draw, clear=False):
+        if not self.tile_rect(key).intersects(self.rect()):
+            return
+        painter = QPainter(self.tile(key, create=True))
+        if clear:
+            painter.fillRect(0, 0, TILE, TILE, Qt.white)
+        painter.translate(-key[0] * TILE, -key[1] * TILE)
+        draw(painter)
+        painter.end()
+
+    # draws the part of the canvas inside rect with painter, which has to be
+    # set up to map canvas pixels to the target
+    def render(self, painter, rect):
+        for key in self.keys(rect):
+            image = self.tile(key)
+            if image is None:
+                painter.fillRect(self.tile_rect(key), self.background)
+            else:
+                painter.drawImage(self.tile_rect(key).topLeft(), image)
+
+    # keys of the tiles allocated so far
+    def allocated(self):
+        return list(self.tiles) + list(self.packed)
+
+    # the canvas area covered by the tiles drawn on so far
+    def used_rect(self):
+        area = QRect()
+        for key in self.allocated():
+            area = area.united(self.tile_rect(key))
+        return area.intersected(self.rect())
+
+    # copies the canvas area rect into a new image
+    def to_image(self, rect):
+        image = QImage(rect.size(), QImage.Format_RGB32)
+        painter = QPainter(image)
+        painter.translate(-rect.left(), -rect.top())
+        self.render(painter, rect)
+        painter.end()
+        return image
+
+    def clear(self):
+        self.tiles.clear()
+        self.packed.clear()
+        self.background = QColor(Qt.white)
+
+    # packs the least recently used tiles until max_tiles are left
+    def shrink(self):
+        while len(self.tiles) > self.max_tiles:
+            key, image = self.tiles.popitem(last=False)
+            bits = image.constBits()
+            bits.setsize(image.sizeInBytes())
+            self.packed[key] = zlib.compress(bytes(bits), 1)
+
+    # bytes held by the canvas, unpacked tiles plus packed ones
+    def memory(self):
+        return len(self.tiles) * TILE * TILE * 4 + sum(len(data) for data in self.packed.values())
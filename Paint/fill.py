@@ -0,0 +1,165 @@
+# fill.py
+# Bucket fill for Paint.
+# flood() works on the pixels of a QImage through a numpy view of its bits,
+# nothing is copied. It is a scanline fill: every step takes a whole run of
+# matching pixels in one row and looks for new runs in the rows above and
+# below it, so the python loop runs once per run instead of once per pixel.
+# The filled area is kept as a list of runs (row, first, last column), which
+# is all undo needs to draw it again, see strokes.py.
+# A fill that reaches the untouched part of the canvas also covers all of
+# it, without a run per pixel: outside is the area the fill was worked out
+# on, and every pixel outside it is filled as well. See canvas.background.
+
+from array import array
+
+import numpy as np
+from PyQt5.QtGui import QColor, QImage, QRegion
+from PyQt5.QtCore import QRect
+
+from strokes import TILE
+
+
+# numpy view of the pixels of a 32 bit QImage, shape (height, width)
+# writing to the view writes to the image
+def pixels(image):
+    bits = image.bits()
+    bits.setsize(image.sizeInBytes())
+    rows = np.frombuffer(bits, np.uint32).reshape(image.height(), image.bytesPerLine() // 4)
+    return rows[:, :image.width()]
+
+
+# pixels that are within tolerance of target in every color channel
+def matching(view, target, tolerance):
+    if tolerance <= 0:
+        return view == target
+    channels = view.view(np.uint8).reshape(view.shape + (4,))[..., :3].astype(np.int16)
+    target = np.array([target & 0xFF, (target >> 8) & 0xFF, (target >> 16) & 0xFF], np.int16)
+    return (np.abs(channels - target) <= tolerance).all(axis=2)
+
+
+# True if the color (a QRgb) is within tolerance of target
+def color_matches(color, target, tolerance=0):
+    return bool(matching(np.array([[color]], np.uint32), np.uint32(target), tolerance)[0, 0])
+
+
+# runs of pixels connected to (x, y) that match its color within tolerance
+# returns (rows, firsts, lasts) arrays sorted by row
+def scanline_fill(view, x, y, tolerance=0):
+    match = matching(view, view[y, x], tolerance)
+    done = np.zeros(match.shape, bool)
+    height, width = match.shape
+    found = []
+    seeds = [(x, y)]
+    while seeds:
+        x, y = seeds.pop()
+        if done[y, x]:
+            continue
+        # the run through x, up to the first pixel on each side that does
+        # not match (argmin finds the first False, or 0 if there is none)
+        before = match[y, x::-1]
+        k = int(before.argmin())
+        left = 0 if before[k] else x - k + 1
+        after = match[y, x:]
+        k = int(after.argmin())
+        right = width - 1 if after[k] else x + k - 1
+        done[y, left:right + 1] = True
+        found.append((y, left, right))
+        for ny in (y - 1, y + 1):
+            if 0 <= ny < height:
+                open_ = match[ny, left:right + 1] & ~done[ny, left:right + 1]
+                # usually the row we came from, nothing left to do there
+                if not open_.any():
+                    continue
+                # one seed per run of open pixels next to this run
+                starts = np.flatnonzero(open_[1:] & ~open_[:-1]) + 1
+                if open_[0]:
+                    seeds.append((left, ny))
+                seeds.extend((left + int(s), ny) for s in starts)
+    found.sort()
+    return (array("i", (r[0] for r in found)), array("i", (r[1] for r in found)),
+            array("i", (r[2] for r in found)))
+
+
+# a bucket fill, kept as runs of canvas pixels
+# it has the same interface as a Stroke, so the stroke history can index,
+# undo and redo it
+class Fill:
+    __slots__ = ("rows", "firsts", "lasts", "color", "cells", "outside")
+
+    def __init__(self, rows, firsts, lasts, color, outside=None):
+        self.rows = rows
+        self.firsts = firsts
+        self.lasts = lasts
+        self.color = QColor(color).rgba()
+        self.cells = ()
+        # a QRect, the fill also covers every canvas pixel outside it
+        self.outside = outside
+
+    # fills the area of image around point with color
+    # offset is the canvas position of the image's top left corner
+    # returns None when there is nothing to fill
+    @classmethod
+    def flood(cls, image, point, color, tolerance=0, offset=None):
+        view = pixels(image)
+        if QColor.fromRgb(int(view[point.y(), point.x()])).rgb() == QColor(color).rgb():
+            return None
+        rows, firsts, lasts = scanline_fill(view, point.x(), point.y(), tolerance)
+        if offset is not None:
+            rows = array("i", (r + offset.y() for r in rows))
+            firsts = array("i", (f + offset.x() for f in firsts))
+            lasts = array("i", (l + offset.x() for l in lasts))
+        return cls(rows, firsts, lasts, color)
+
+    def __len__(self):
+        return len(self.rows)
+
+    # True if the fill reaches an edge of rect that is not an edge of bounds,
+    # i.e. the fill goes on beyond rect
+    def touches_edge(self, rect, bounds):
+        rows = np.frombuffer(self.rows, np.int32)
+        if rect.top() > bounds.top() and rows[0] == rect.top():
+            return True
+        if rect.bottom() < bounds.bottom() and rows[-1] == rect.bottom():
+            return True
+        if rect.left() > bounds.left() and (np.frombuffer(self.firsts, np.int32) == rect.left()).any():
+            return True
+        return rect.right() < bounds.right() and bool((np.frombuffer(self.lasts, np.int32) == rect.right()).any())
+
+    # draws the runs that fall on the painter's device
+    # they are turned into one image with numpy, which is drawn in one go
+    def draw(self, painter):
+        device = painter.device()
+        area = painter.transform().inverted()[0].mapRect(QRect(0, 0, device.width(), device.height()))
+        if self.outside is not None:
+            region = QRegion(area).subtracted(QRegion(self.outside))
+            if not region.isEmpty():
+                painter.save()
+                painter.setClipRegion(region)
+                painter.fillRect(area, QColor.fromRgba(self.color))
+                painter.restore()
+        rows = np.frombuffer(self.rows, np.int32)
+        start, end = np.searchsorted(rows, [area.top(), area.bottom() + 1])
+        width, height = area.width(), area.height()
+        rows = rows[start:end] - area.top()
+        firsts = np.clip(np.frombuffer(self.firsts, np.int32)[start:end] - area.left(), 0, width)
+        ends = np.clip(np.frombuffer(self.lasts, np.int32)[start:end] + 1 - area.left(), 0, width)
+        keep = firsts < ends
+        if not keep.any():
+            return
+        # +1 where a run starts and -1 after it ends, summed along the rows
+        edges = np.zeros((height, width + 1), np.int8)
+        edges[rows[keep], firsts[keep]] += 1
+        edges[rows[keep], ends[keep]] -= 1
+        inside = np.cumsum(edges[:, :width], axis=1, dtype=np.int8) > 0
+        colors = np.where(inside, np.uint32(self.color), np.uint32(0))
+        painter.drawImage(area.topLeft(), QImage(colors.data, width, height, width * 4, QImage.Format_ARGB32))
+
+    # one box per band of TILE rows, used by the stroke index
+    def segment_rects(self):
+        rows = np.frombuffer(self.rows, np.int32)
+        firsts = np.frombuffer(self.firsts, np.int32)
+        lasts = np.frombuffer(self.lasts, np.int32)
+        bands = rows // TILE
+        for band in np.unique(bands):
+            inside = bands == band
+            yield int(firsts[inside].min()), int(rows[inside].min()), int(lasts[inside].max()), int(rows[inside].max())
@@ -0,0 +1,366 @@
+# journal.py
+# Crash-safe autosave for Paint.
+# Every stroke, fill, undo, redo and clear is appended to a journal file as
+# a small record, by a background thread, so the drawing code only puts the
+# record on a queue. Every SNAPSHOT_OPS records the whole stroke history is
+# written to a zlib compressed snapshot and the journal starts over.
+# Both hold the strokes as vectors, so their cost depends on what was drawn,
+# not on the size of the canvas.
+# After a crash, recover() loads the snapshot and replays the journal records
+# written after it. A record cut short by the crash fails its checksum and
+# the replay stops there.
+# Every Paint window keeps its own session directory in AUTOSAVE_DIR and
+# holds a lock on it while it runs. The lock goes away with the process, so
+# a session directory nobody holds is one left behind by a crash, and a
+# second window never mistakes the first one's journal for a crashed one.
+# A new session is made and locked under a "new-" name first and only then
+# renamed to "session-", so no other window can get hold of it before that.
+#
+# record:   seq (uint32), kind (uint8), length (uint32), payload, crc32
+# snapshot: magic, seq of the last record in it, visible count, records
+
+import os
+import queue
+import shutil
+import struct
+import threading
+import tempfile
+import zlib
+from array import array
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+from PyQt5.QtCore import QRect
+from PyQt5.QtGui import QColor
+
+from fill import Fill
+from strokes import Drawing, Stroke
+
+# where the session directories with the journal and the snapshot are kept
+AUTOSAVE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "paint", "autosave")
+
+# records between two snapshots
+SNAPSHOT_OPS = 200
+
+# record kinds
+STROKE, FILL, UNDO, REDO, CLEAR = range(1, 6)
+
+HEADER = struct.Struct("<IBI")
+CRC = struct.Struct("<I")
+SNAPSHOT_HEADER = struct.Struct("<4sII")
+SNAPSHOT_MAGIC = b"PSN1"
+
+
+# payload of a stroke or fill record
+# a fill of the untouched canvas ends with its outside rect
+def encode(item):
+    if isinstance(item, Fill):
+        payload = struct.pack("<II", item.color, len(item)) + item.rows.tobytes() + item.firsts.tobytes() + item.lasts.tobytes()
+        if item.outside is not None:
+            rect = item.outside
+            payload += struct.pack("<4i", rect.x(), rect.y(), rect.width(), rect.height())
+        return FILL, payload
+    return STROKE, struct.pack("<IiB", item.color, item.width, item.eraser) + item.points.tobytes()
+
+
+# the stroke or fill in a payload
+def decode(kind, payload):
+    if kind == FILL:
+        color, count = struct.unpack_from("<II", payload)
+        arrays = []
+        for i in range(3):
+            values = array("i")
+            values.frombytes(payload[8 + i * count * 4:8 + (i + 1) * count * 4])
+            arrays.append(values)
+        outside = None
+        if len(payload) >= 8 + count * 12 + 16:
+            outside = QRect(*struct.unpack_from("<4i", payload, 8 + count * 12))
+        return Fill(*arrays, QColor.fromRgba(color), outside)
+    color, width, eraser = struct.unpack_from("<IiB", payload)
+    stroke = Stroke(QColor.fromRgba(color), width, bool(eraser))
+    stroke.points.frombytes(payload[9:])
+    return stroke
+
+
+# locks the session in directory, returns the open lock file, or None if
+# a running Paint holds it
+def lock_session(directory):
+    try:
+        lock = open(os.path.join(directory, "lock"), "a+b")
+    except OSError:
+        return None
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            lock.seek(0)
+            msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        lock.close()
+        return None
+    return lock
+
+
+# deletes a session directory, its lock file has to be closed first
+def remove_session(directory, lock=None):
+    if lock is not None:
+        lock.close()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def pack_record(seq, kind, payload=b""):
+    data = HEADER.pack(seq, kind, len(payload)) + payload
+    return data + CRC.pack(zlib.crc32(data))
+
+
+# (seq, kind, payload) for every complete record in data
+def read_records(data):
+    offset = 0
+    while offset + HEADER.size <= len(data):
+        seq, kind, length = HEADER.unpack_from(data, offset)
+        end = offset + HEADER.size + length
+        if end + CRC.size > len(data):
+            return
+        if zlib.crc32(data[offset:end]) != CRC.unpack_from(data, end)[0]:
+            return
+        yield seq, kind, data[offset + HEADER.size:end]
+        offset = end + CRC.size
+
+
+# applies one record to drawing, only the vectors are changed
+def replay(drawing, kind, payload):
+    if kind in (STROKE, FILL):
+        drawing.add(decode(kind, payload))
+    elif kind == UNDO and drawing.visible:
+        drawing.visible -= 1
+    elif kind == REDO and drawing.visible < len(drawing.strokes):
+        drawing.visible += 1
+    elif kind == CLEAR:
+        drawing.clear()
+
+
+def journal_path(directory):
+    return os.path.join(directory, "journal.bin")
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, "snapshot.bin")
+
+
+# the stroke history kept in a session directory, as (drawing, seq of the
+# last record read)
+def read_session(directory):
+    drawing = Drawing()
+    seq = 0
+    try:
+        with open(snapshot_path(directory), "rb") as f:
+            data = zlib.decompress(f.read())
+        magic, seq, visible = SNAPSHOT_HEADER.unpack_from(data)
+        if magic == SNAPSHOT_MAGIC:
+            for _, kind, payload in read_records(data[SNAPSHOT_HEADER.size:]):
+                drawing.add(decode(kind, payload))
+            drawing.visible = visible
+        else:
+            seq = 0
+    except (OSError, zlib.error, struct.error):
+        drawing = Drawing()
+        seq = 0
+    try:
+        with open(journal_path(directory), "rb") as f:
+            data = f.read()
+    except OSError:
+        data = b""
+    for record_seq, kind, payload in read_records(data):
+        # records from before the snapshot are already in it
+        if record_seq > seq:
+            replay(drawing, kind, payload)
+            seq = record_seq
+    return drawing, seq
+
+
+class Autosave:
+    def __init__(self, root=AUTOSAVE_DIR):
+        self.root = root
+        # this session's directory and lock, made by start()
+        self.directory = None
+        self._lock = None
+        # a crashed session claimed by exists(), as (directory, lock), and
+        # what was read from it, as (drawing, seq)
+        self._orphan = None
+        self._recovered = None
+        self.seq = 0
+        self.since_snapshot = 0
+        self._queue = queue.Queue()
+        self._thread = None
+
+    # True if a session that crashed left strokes to recover; the newest
+    # one is locked, so no other window offers it as well
+    def exists(self):
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return False
+        sessions = []
+        for name in names:
+            directory = os.path.join(self.root, name)
+            if name.startswith("session-"):
+                paths = [p for p in (directory, journal_path(directory), snapshot_path(directory)) if os.path.exists(p)]
+                sessions.append((max(os.path.getmtime(p) for p in paths), directory))
+        for _, directory in sorted(sessions, reverse=True):
+            lock = lock_session(directory)
+            if lock is None:
+                # a running Paint
+                continue
+            drawing, seq = read_session(directory)
+            if drawing.strokes:
+                self._orphan = (directory, lock)
+                self._recovered = (drawing, seq)
+                return True
+            remove_session(directory, lock)
+        return False
+
+    # rebuilds the stroke history of the crashed session found by exists()
+    # returns a Drawing; the canvas has to be drawn from it
+    def recover(self):
+        drawing, self.seq = self._recovered
+        self._recovered = None
+        return drawing
+
+    # makes this session's directory and starts the writer thread
+    # drawing is written as the first snapshot, e.g. a recovered one; the
+    # crashed session is deleted once that snapshot is on disk
+    # if the directory cannot be made or locked Paint runs without autosave
+    def start(self, drawing):
+        try:
+            self.directory, self._lock = self._new_session()
+        except OSError:
+            self.directory = self._lock = None
+        if self._lock is None:
+            if self.directory is not None:
+                remove_session(self.directory)
+                self.directory = None
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.snapshot(drawing)
+        if self._orphan is not None:
+            self._queue.put(("remove",) + self._orphan)
+            self._orphan = None
+
+    # makes a locked session directory, returns (directory, lock), the lock
+    # is None if it could not be taken
+    def _new_session(self):
+        os.makedirs(self.root, exist_ok=True)
+        temp = tempfile.mkdtemp(prefix="new-", dir=self.root)
+        lock = lock_session(temp)
+        if lock is None:
+            return temp, None
+        directory = os.path.join(self.root, "session-" + os.path.basename(temp)[len("new-"):])
+        try:
+            os.rename(temp, directory)
+        except OSError:
+            # windows does not rename a directory with an open file in it
+            lock.close()
+            os.rename(temp, directory)
+            lock = lock_session(directory)
+        return directory, lock
+
+    # ========== called from the drawing code, never waits ==========
+    def add(self, item, drawing):
+        self._record(*encode(item), drawing=drawing)
+
+    def undo(self, drawing):
+        self._record(UNDO, drawing=drawing)
+
+    def redo(self, drawing):
+        self._record(REDO, drawing=drawing)
+
+    def clear(self, drawing):
+        self._record(CLEAR)
+        # nothing to keep, start over with an empty snapshot
+        self.snapshot(drawing)
+
+    def _record(self, kind, payload=b"", drawing=None):
+        if self._thread is None:
+            return
+        self.seq += 1
+        self._queue.put(("record", pack_record(self.seq, kind, payload)))
+        self.since_snapshot += 1
+        if drawing is not None and self.since_snapshot >= SNAPSHOT_OPS:
+            self.snapshot(drawing)
+
+    # queues a snapshot of drawing; strokes never change once recorded, so
+    # the writer thread can encode them later
+    def snapshot(self, drawing):
+        if self._thread is None:
+            return
+        self.since_snapshot = 0
+        self._queue.put(("snapshot", self.seq, list(drawing.strokes), drawing.visible))
+
+    # stops the writer; discard=True deletes this session's autosave, e.g.
+    # on a normal exit
+    def stop(self, discard=False):
+        if self._thread is not None:
+            self._queue.put(("stop",))
+            self._thread.join()
+            self._thread = None
+        if self._orphan is not None:
+            # claimed but never started, leave it for the next window
+            self._orphan[1].close()
+            self._orphan = None
+        if self.directory is None:
+            return
+        if discard:
+            remove_session(self.directory, self._lock)
+        elif self._lock is not None:
+            self._lock.close()
+        self._lock = None
+
+    # ========== writer thread ==========
+    def _run(self):
+        journal = open(journal_path(self.directory), "ab")
+        try:
+            while True:
+                tasks = [self._queue.get()]
+                # everything queued so far goes out with one fsync
+                while True:
+                    try:
+                        tasks.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                for task in tasks:
+                    if task[0] == "record":
+                        journal.write(task[1])
+                    elif task[0] == "snapshot":
+                        journal.flush()
+                        self._write_snapshot(*task[1:])
+                        # the snapshot holds everything up to here
+                        journal.truncate(0)
+                        journal.seek(0)
+                    elif task[0] == "remove":
+                        remove_session(*task[1:])
+                    else:
+                        journal.flush()
+                        os.fsync(journal.fileno())
+                        return
+                journal.flush()
+                os.fsync(journal.fileno())
+        finally:
+            journal.close()
+
+    # writes the snapshot through a temporary file, so a crash while writing
+    # leaves the previous snapshot in place
+    def _write_snapshot(self, seq, strokes, visible):
+        parts = [SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, seq, visible)]
+        parts.extend(pack_record(0, *encode(item)) for item in strokes)
+        path = snapshot_path(self.directory)
+        temp = path + ".tmp"
+        with open(temp, "wb") as f:
+            f.write(zlib.compress(b"".join(parts), 6))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
@@ -2,7 +2,23 @@
 from PyQt5.QtWidgets import * 
 from PyQt5.QtGui import * 
 from PyQt5.QtCore import * 
+import math
 import sys
+from canvas import TiledCanvas
+from fill import Fill, color_matches
+from journal import Autosave
+from strokes import Drawing, Stroke
+
+# zoom limits and the step of one zoom in / out
+MIN_ZOOM = 0.05
+MAX_ZOOM = 16.0
+ZOOM_STEP = 1.25
+
+# mouse moves are collected and drawn once per frame, every FRAME_MS
+FRAME_MS = 16
+
+# a fill covers at most FILL_SIZE x FILL_SIZE canvas pixels around the click
+FILL_SIZE = 4096
 
 # window class
 class Window(QMainWindow):
@@ -18,9 +34,13 @@ class Window(QMainWindow):
         # Set window icon
         self.setWindowIcon(QIcon('ms_paint_icon.jpg'))
 
-        # creating image object
-        self.image = QImage(self.size(), QImage.Format_RGB32)
-        self.image.fill(Qt.white)
+        # 🔹 creating the canvas, tiles are only allocated once drawn on
+        self.canvas = TiledCanvas()
+
+        # 🔹 view: canvas pixel at the top left of the window, and the zoom
+        self.offset = QPointF(0, 0)
+        self.zoom = 1.0
+        self.panPoint = None
 
         # variables
         self.drawing = False
@@ -29,16 +49,41 @@ class Window(QMainWindow):
         self.brushColor = Qt.black
         self.lastPoint = QPoint()
         self.eraserMode = False  # 🔹 new flag for eraser
+        self.fillMode = False  # 🔹 bucket fill tool
+        self.fillTolerance = 0
+
+        # 🔹 every stroke is also kept as vectors, for undo and redo
+        self.drawing_model = Drawing()
+        self.stroke = None
+
+        # 🔹 canvas points of the mouse moves not drawn yet
+        self.pendingPoints = []
+        self.flushTimer = QTimer(self)
+        self.flushTimer.setSingleShot(True)
+        self.flushTimer.setInterval(FRAME_MS)
+        self.flushTimer.timeout.connect(self.flushStroke)
+
+        # 🔹 autosave journal, offers to bring back the drawing after a crash
+        self.autosave = Autosave()
+        if self.autosave.exists() and QMessageBox.question(
+                self, "Paint", "Paint did not close properly last time.\nRecover the drawing?") == QMessageBox.Yes:
+            self.drawing_model = self.autosave.recover()
+            self.canvas.background = self.drawing_model.background()
+            self.drawing_model.redraw(self.canvas, self.drawing_model.cells(self.canvas))
+        self.autosave.start(self.drawing_model)
 
         # creating menu bar
         mainMenu = self.menuBar()
 
         # creating menus
         fileMenu = mainMenu.addMenu("File")
+        editMenu = mainMenu.addMenu("Edit")
         b_size = mainMenu.addMenu("Brush Size")
         b_color = mainMenu.addMenu("Brush Color")
         toolsMenu = mainMenu.addMenu("Tools")  # 🔹 New Tools menu
+        viewMenu = mainMenu.addMenu("View")
         e_size = mainMenu.addMenu("Eraser Size")  # 🔹 New Eraser Size menu
+        f_tolerance = mainMenu.addMenu("Fill Tolerance")
 
         # File menu actions
         saveAction = QAction("Save", self)
@@ -51,6 +96,25 @@ class Window(QMainWindow):
         fileMenu.addAction(clearAction)
         clearAction.triggered.connect(self.clear)
 
+        # Edit menu actions
+        undoAction = QAction("Undo", self)
+        undoAction.setShortcut("Ctrl+Z")
+        editMenu.addAction(undoAction)
+        undoAction.triggered.connect(self.undo)
+
+        redoAction = QAction("Redo", self)
+        redoAction.setShortcut("Ctrl+Y")
+        editMenu.addAction(redoAction)
+        redoAction.triggered.connect(self.redo)
+
+        # View menu actions, the middle mouse button drags the canvas
+        for name, shortcut, func in [("Zoom In", "Ctrl++", self.zoomIn), ("Zoom Out", "Ctrl+-", self.zoomOut),
+                                     ("Actual Size", "Ctrl+0", self.actualSize)]:
+            act = QAction(name, self)
+            act.setShortcut(shortcut)
+            viewMenu.addAction(act)
+            act.triggered.connect(func)
+
         # Brush sizes
         for size, func in [(4, self.Pixel_4), (7, self.Pixel_7), (9, self.Pixel_9), (12, self.Pixel_12)]:
             act = QAction(f"{size}px", self)
@@ -80,49 +144,207 @@ class Window(QMainWindow):
         toolsMenu.addAction(eraserAction)
         eraserAction.triggered.connect(self.useEraser)
 
+        # 🔹 Brush and Fill Tools
+        brushAction = QAction("Brush", self)
+        toolsMenu.addAction(brushAction)
+        brushAction.triggered.connect(self.useBrush)
+
+        fillAction = QAction("Fill", self)
+        toolsMenu.addAction(fillAction)
+        fillAction.triggered.connect(self.useFill)
+
+        # Fill tolerances, how far a color may be from the clicked one
+        for tolerance in (0, 16, 32, 64):
+            act = QAction(str(tolerance), self)
+            f_tolerance.addAction(act)
+            act.triggered.connect(lambda _, t=tolerance: self.setFillTolerance(t))
+
     # ========== MOUSE EVENTS ==========
+    # mouse positions are turned into canvas pixels first
     def mousePressEvent(self, event):
-        if event.button() == Qt.LeftButton:
+        if event.button() == Qt.LeftButton and self.fillMode:
+            self.fillAt(event.pos())
+        elif event.button() == Qt.LeftButton:
             self.drawing = True
-            self.lastPoint = event.pos()
-
-    def mouseMoveEvent(self, event):
-        if (event.buttons() & Qt.LeftButton) and self.drawing:
-            painter = QPainter(self.image)
-
+            self.lastPoint = self.toCanvas(event.pos())
             # 🔹 If eraser is active, use white color and eraser size
             if self.eraserMode:
-                color = Qt.white
-                size = self.eraserSize
+                self.stroke = Stroke(Qt.white, self.eraserSize, eraser=True)
             else:
-                color = self.brushColor
-                size = self.brushSize
+                self.stroke = Stroke(self.brushColor, self.brushSize)
+            self.stroke.add(self.lastPoint)
+        elif event.button() == Qt.MiddleButton:
+            self.panPoint = event.pos()
 
-            painter.setPen(QPen(color, size,
-                                Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin))
-            painter.drawLine(self.lastPoint, event.pos())
-            self.lastPoint = event.pos()
-            self.update()
+    def mouseMoveEvent(self, event):
+        if (event.buttons() & Qt.LeftButton) and self.drawing:
+            # 🔹 only collected here, flushStroke() draws them on the next frame
+            point = self.toCanvas(event.pos())
+            last = self.pendingPoints[-1] if self.pendingPoints else self.lastPoint
+            if point != last:
+                self.pendingPoints.append(point)
+                if not self.flushTimer.isActive():
+                    self.flushTimer.start()
+        elif (event.buttons() & Qt.MiddleButton) and self.panPoint is not None:
+            delta = event.pos() - self.panPoint
+            self.panPoint = event.pos()
+            self.pan(-delta.x() / self.zoom, -delta.y() / self.zoom)
 
     def mouseReleaseEvent(self, event):
+        if event.button() == Qt.MiddleButton:
+            self.panPoint = None
         if event.button() == Qt.LeftButton:
+            self.flushStroke()
             self.drawing = False
+            # a click without moving draws nothing, so it is not recorded
+            if self.stroke is not None and len(self.stroke) > 1:
+                self.drawing_model.add(self.stroke)
+                self.autosave.add(self.stroke, self.drawing_model)
+            self.stroke = None
+
+    # draws the collected mouse moves as one polyline, with one painter per
+    # tile it crosses, and repaints only the area around it
+    def flushStroke(self):
+        self.flushTimer.stop()
+        if not self.pendingPoints or self.stroke is None:
+            self.pendingPoints = []
+            return
+        line = QPolygon([self.lastPoint] + self.pendingPoints)
+        pen = self.stroke.pen()
+        rect = self.strokeRect(line, self.stroke.width)
+        self.canvas.draw(rect, lambda painter: (painter.setPen(pen), painter.drawPolyline(line)))
+        for point in self.pendingPoints:
+            self.stroke.add(point)
+        self.lastPoint = self.pendingPoints[-1]
+        self.pendingPoints = []
+        self.update(self.toWidget(rect))
+
+    # bucket fill at the window position pos, in the brush color
+    # the fill is worked out on the tiles drawn on so far plus the clicked
+    # one, at most FILL_SIZE pixels each way so a large drawing cannot make
+    # the fill image huge. Every other tile still has the background color,
+    # so a fill of that color that reaches the edge of the area also covers
+    # all of them, by changing the canvas background (see fill.py)
+    def fillAt(self, pos):
+        point = self.toCanvas(pos)
+        if not self.canvas.rect().contains(point):
+            return
+        tile = self.canvas.tile_rect(self.canvas.keys(QRect(point, point))[0])
+        used = self.canvas.used_rect().united(tile).intersected(self.canvas.rect())
+        half = FILL_SIZE // 2
+        area = used.intersected(QRect(point.x() - half, point.y() - half, FILL_SIZE, FILL_SIZE))
+        image = self.canvas.to_image(area)
+        seed = image.pixel(point - area.topLeft())
+        fill = Fill.flood(image, point - area.topLeft(), self.brushColor, self.fillTolerance, area.topLeft())
+        if fill is None:
+            return
+        # only when area holds every tile drawn on, so everything outside
+        # it really is untouched
+        if (area == used and fill.touches_edge(area, self.canvas.rect())
+                and color_matches(self.canvas.background.rgb(), seed, self.fillTolerance)):
+            fill.outside = area
+            # the untouched tiles inside area keep the old background
+            for key in self.canvas.keys(area):
+                self.canvas.tile(key, create=True)
+            self.canvas.background = QColor(self.brushColor)
+        self.drawing_model.add(fill)
+        self.autosave.add(fill, self.drawing_model)
+        for cell in fill.cells:
+            self.canvas.draw_tile(cell, fill.draw)
+        if fill.outside is not None:
+            self.update()
+        else:
+            self.update(self.toWidget(self.drawing_model.cells_rect(fill.cells)))
+
+    # bounding box of a line through points, padded by half the pen width
+    # (plus a pixel for antialiasing) so the round caps are included
+    def strokeRect(self, points, size):
+        pad = size // 2 + 2
+        return points.boundingRect().adjusted(-pad, -pad, pad, pad)
+
+    # the wheel scrolls the canvas, with Ctrl held it zooms at the cursor
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() / 120
+        if event.modifiers() & Qt.ControlModifier:
+            self.setZoom(self.zoom * ZOOM_STEP ** steps, event.pos())
+        else:
+            self.pan(-event.angleDelta().x() / self.zoom, -event.angleDelta().y() / self.zoom)
+
+    # ========== VIEW ==========
+    # canvas pixel under the window position pos
+    def toCanvas(self, pos):
+        return QPoint(math.floor(pos.x() / self.zoom + self.offset.x()),
+                      math.floor(pos.y() / self.zoom + self.offset.y()))
+
+    # window area showing the canvas area rect
+    def toWidget(self, rect):
+        area = QRectF(QPointF(rect.topLeft()) - self.offset, QSizeF(rect.size()))
+        area = QRectF(area.topLeft() * self.zoom, area.size() * self.zoom)
+        return area.toAlignedRect().adjusted(-1, -1, 1, 1)
+
+    def pan(self, dx, dy):
+        self.offset += QPointF(dx, dy)
+        self.update()
+
+    # zooms keeping the canvas pixel under the window position anchor in place
+    def setZoom(self, zoom, anchor=None):
+        zoom = min(MAX_ZOOM, max(MIN_ZOOM, zoom))
+        if anchor is None:
+            anchor = self.rect().center()
+        self.offset += QPointF(anchor) / self.zoom - QPointF(anchor) / zoom
+        self.zoom = zoom
+        self.update()
+
+    def zoomIn(self): self.setZoom(self.zoom * ZOOM_STEP)
+    def zoomOut(self): self.setZoom(self.zoom / ZOOM_STEP)
+    def actualSize(self): self.setZoom(1.0)
 
     def paintEvent(self, event):
+        # only the dirty part of the window is drawn, from the tiles under it
         canvasPainter = QPainter(self)
-        canvasPainter.drawImage(self.rect(), self.image, self.image.rect())
+        canvasPainter.fillRect(event.rect(), Qt.gray)
+        canvasPainter.scale(self.zoom, self.zoom)
+        canvasPainter.translate(-self.offset)
+        canvasPainter.setClipRect(self.canvas.rect())
+        visible = canvasPainter.transform().inverted()[0].mapRect(QRectF(event.rect())).toAlignedRect()
+        self.canvas.render(canvasPainter, visible)
 
     # ========== FILE METHODS ==========
     def save(self):
         filePath, _ = QFileDialog.getSaveFileName(self, "Save Image", "",
                           "PNG(*.png);;JPEG(*.jpg *.jpeg);;All Files(*.*)")
         if filePath:
-            self.image.save(filePath)
+            # 🔹 only the part of the canvas that was drawn on is saved
+            rect = self.canvas.used_rect()
+            if rect.isEmpty():
+                rect = QRect(QPoint(0, 0), self.size())
+            self.canvas.to_image(rect).save(filePath)
 
     def clear(self):
-        self.image.fill(Qt.white)
+        self.canvas.clear()
+        self.drawing_model.clear()
+        self.autosave.clear(self.drawing_model)
         self.update()
 
+    # a normal exit, the autosave is not needed any more
+    def closeEvent(self, event):
+        self.autosave.stop(discard=True)
+        super().closeEvent(event)
+
+    # ========== UNDO / REDO ==========
+    # only the tiles the stroke went through are drawn again
+    def undo(self):
+        area = self.drawing_model.undo(self.canvas)
+        if area is not None:
+            self.autosave.undo(self.drawing_model)
+            self.update(self.toWidget(area))
+
+    def redo(self):
+        area = self.drawing_model.redo(self.canvas)
+        if area is not None:
+            self.autosave.redo(self.drawing_model)
+            self.update(self.toWidget(area))
+
     # ========== BRUSH SIZE METHODS ==========
     def Pixel_4(self): self.brushSize = 4
     def Pixel_7(self): self.brushSize = 7
@@ -142,6 +364,18 @@ class Window(QMainWindow):
 
     def useEraser(self):
         self.eraserMode = True  # enable eraser
+        self.fillMode = False
+
+    def useBrush(self):
+        self.eraserMode = False
+        self.fillMode = False
+
+    def useFill(self):
+        self.eraserMode = False
+        self.fillMode = True
+
+    def setFillTolerance(self, tolerance):
+        self.fillTolerance = tolerance
 
 # create pyqt5 app
 App = QApplication(sys.argv)
@@ -0,0 +1,189 @@
+# strokes.py
+# Vector stroke history for Paint.
+# Every stroke is kept as a flat array of its points plus its color, width
+# and eraser flag, which is a few bytes per point instead of a copy of the
+# whole canvas per undo step.
+# The strokes are filed in a grid of TILE x TILE cells, the tiles of the
+# canvas (see canvas.py). Undoing a stroke only repaints the tiles it went
+# through, by drawing the strokes filed in those tiles again from a white
+# background.
+# Fills that also cover the untouched canvas (see fill.py) are drawn again
+# on every tile, and undoing or redoing one repaints every allocated tile
+# and changes the canvas background.
+
+from array import array
+from collections import defaultdict
+
+from PyQt5.QtGui import QColor, QPen, QPolygon
+from PyQt5.QtCore import QPoint, QRect, Qt
+
+# edge length of a grid cell in pixels
+TILE = 256
+
+
+# one stroke of the brush or eraser
+class Stroke:
+    __slots__ = ("points", "color", "width", "eraser", "cells")
+
+    def __init__(self, color, width, eraser=False):
+        # x0, y0, x1, y1, ...
+        self.points = array("i")
+        # the eraser paints white
+        self.color = QColor(Qt.white if eraser else color).rgba()
+        self.width = width
+        self.eraser = eraser
+        # grid cells the stroke passes through, filled in by StrokeIndex
+        self.cells = ()
+
+    def add(self, point):
+        self.points.append(point.x())
+        self.points.append(point.y())
+
+    def __len__(self):
+        return len(self.points) // 2
+
+    def pen(self):
+        return QPen(QColor.fromRgba(self.color), self.width, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin)
+
+    def draw(self, painter):
+        p = self.points
+        painter.setPen(self.pen())
+        painter.drawPolyline(QPolygon([QPoint(p[i], p[i + 1]) for i in range(0, len(p), 2)]))
+
+    # bounding box of every segment, padded by half the pen width
+    # (plus a pixel for antialiasing) so the round caps are included
+    def segment_rects(self):
+        p = self.points
+        pad = self.width // 2 + 2
+        for i in range(0, max(2, len(p) - 2), 2):
+            x1, y1 = p[i], p[i + 1]
+            x2, y2 = p[min(i + 2, len(p) - 2)], p[min(i + 3, len(p) - 1)]
+            yield min(x1, x2) - pad, min(y1, y2) - pad, max(x1, x2) + pad, max(y1, y2) + pad
+
+
+# draws strokes in order
+def draw_all(strokes, painter):
+    for stroke in strokes:
+        stroke.draw(painter)
+
+
+# grid cell -> ids of the strokes that pass through it, in drawing order
+class StrokeIndex:
+    def __init__(self, cell=TILE):
+        self.cell = cell
+        self.cells = defaultdict(list)
+
+    # the cells covered by the segments of stroke
+    def cells_for(self, stroke):
+        cells = set()
+        c = self.cell
+        for left, top, right, bottom in stroke.segment_rects():
+            for cx in range(left // c, right // c + 1):
+                for cy in range(top // c, bottom // c + 1):
+                    cells.add((cx, cy))
+        return cells
+
+    def add(self, sid, stroke):
+        stroke.cells = tuple(self.cells_for(stroke))
+        for cell in stroke.cells:
+            self.cells[cell].append(sid)
+
+    def remove(self, sid, stroke):
+        for cell in stroke.cells:
+            ids = self.cells[cell]
+            ids.remove(sid)
+            if not ids:
+                del self.cells[cell]
+
+    def rect(self, cell):
+        return QRect(cell[0] * self.cell, cell[1] * self.cell, self.cell, self.cell)
+
+
+# the strokes drawn so far, with undo and redo
+# strokes[:visible] are on the canvas, the rest can be redone
+class Drawing:
+    def __init__(self):
+        self.strokes = []
+        self.visible = 0
+        self.index = StrokeIndex()
+        # ids of the fills that cover the untouched canvas, in order
+        self.backgrounds = []
+
+    # records a finished stroke, which drops everything that could be redone
+    def add(self, stroke):
+        while len(self.strokes) > self.visible:
+            sid = len(self.strokes) - 1
+            if self.backgrounds and self.backgrounds[-1] == sid:
+                self.backgrounds.pop()
+            self.index.remove(sid, self.strokes.pop())
+        if getattr(stroke, "outside", None) is not None:
+            self.backgrounds.append(len(self.strokes))
+        self.index.add(len(self.strokes), stroke)
+        self.strokes.append(stroke)
+        self.visible += 1
+
+    def clear(self):
+        self.strokes = []
+        self.visible = 0
+        self.index = StrokeIndex(self.index.cell)
+        self.backgrounds = []
+
+    # color of the untouched canvas: that of the last visible fill that
+    # covers it, white if there is none
+    def background(self):
+        for sid in reversed(self.backgrounds):
+            if sid < self.visible:
+                return QColor.fromRgba(self.strokes[sid].color)
+        return QColor(Qt.white)
+
+    # the tiles that have to be drawn to show the whole drawing: the ones
+    # the strokes pass through and the areas the background fills were
+    # worked out on, e.g. after the drawing was recovered
+    def cells(self, canvas):
+        cells = set(self.index.cells)
+        for sid in self.backgrounds:
+            cells.update(canvas.keys(self.strokes[sid].outside))
+        return list(cells)
+
+    # takes the last stroke off canvas, returns the area to update or None
+    def undo(self, canvas):
+        if not self.visible:
+            return None
+        self.visible -= 1
+        stroke = self.strokes[self.visible]
+        if getattr(stroke, "outside", None) is not None:
+            canvas.background = self.background()
+            self.redraw(canvas, canvas.allocated())
+            return canvas.rect()
+        return self.redraw(canvas, stroke.cells)
+
+    # draws the next undone stroke again, returns the area to update or None
+    def redo(self, canvas):
+        if self.visible == len(self.strokes):
+            return None
+        stroke = self.strokes[self.visible]
+        self.visible += 1
+        if getattr(stroke, "outside", None) is not None:
+            canvas.background = self.background()
+            self.redraw(canvas, canvas.allocated())
+            return canvas.rect()
+        for cell in stroke.cells:
+            canvas.draw_tile(cell, stroke.draw)
+        return self.cells_rect(stroke.cells)
+
+    # repaints the given tiles of canvas from the visible strokes
+    # returns the area that was repainted
+    def redraw(self, canvas, cells):
+        for cell in cells:
+            ids = [sid for sid in self.index.cells.get(cell, ()) if sid < self.visible]
+            # fills of the untouched canvas reach every tile
+            ids.extend(sid for sid in self.backgrounds if sid < self.visible and sid not in ids)
+            strokes = [self.strokes[sid] for sid in sorted(ids)]
+            canvas.draw_tile(cell, lambda painter: draw_all(strokes, painter), clear=True)
+        return self.cells_rect(cells)
+
+    def cells_rect(self, cells):
+        area = QRect()
+        for cell in cells:
+            area = area.united(self.index.rect(cell))
+        return area
@@ -0,0 +1,204 @@
+# batch.py
+# Headless batch mode for the photo editor.
+# Applies the same list of operations to every image in a folder, spread
+# over a pool of worker processes, and writes the results to another folder
+# with the same file names. Animated GIF / WebP / PNG and multi-page TIFF
+# files keep all their frames when the output format can hold them.
+#
+# usage:
+#   python batch.py --ops "brightness=1.2,rotate,blur" in_dir out_dir
+#   python photo_editor.py batch --ops "brightness=1.2,rotate,blur" in_dir out_dir
+#   python batch.py --recipe edits.json in_dir out_dir
+#
+# A recipe file is exported from the editor with the Recipe button. Results
+# are kept in a cache keyed by the input file's content and the operations,
+# so running the same operations on the same images again only copies the
+# earlier results (turn it off with --no-cache).
+#
+# operations:
+#   brightness=F contrast=F color=F sharpness=F
+#   rotate flip blur emboss find_edges
+#   blur=RADIUS (Gaussian blur, same cost for any radius)
+#   resize=WxH crop=LEFT:TOP:RIGHT:BOTTOM
+
+import argparse
+import multiprocessing
+import os
+import sys
+import warnings
+
+from PIL import Image
+
+import frames
+import operations
+import recipe
+import saver
+import tiles
+
+# the slot of each fused slider inside an ("adjust", (b, c, color)) stage
+ADJUST_SLOTS = {"brightness": 0, "contrast": 1, "color": 2}
+
+# results between two trims of the result cache
+EVICT_EVERY = 500
+
+
+# turns "brightness=1.2,rotate,blur" into pipeline stages
+# raises ValueError for unknown operations or bad values
+def parse_ops(text):
+    stages = []
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, value = item.partition("=")
+        name = name.strip().lower()
+        value = value.strip()
+        if name in ADJUST_SLOTS:
+            add_adjustment(stages, name, float(value))
+        elif name == "sharpness" or (name == "blur" and value):
+            stages.append((name, (float(value),)))
+        elif name == "resize":
+            width, height = value.lower().split("x")
+            stages.append((name, ((int(width), int(height)),)))
+        elif name == "crop":
+            box = tuple(int(v) for v in value.split(":"))
+            if len(box) != 4:
+                raise ValueError("crop needs LEFT:TOP:RIGHT:BOTTOM")
+            stages.append((name, (box,)))
+        elif name in operations.OPERATIONS:
+            if value:
+                raise ValueError(f"{name} does not take a value")
+            stages.append((name, ()))
+        else:
+            raise ValueError(f"unknown operation: {name}")
+    if not stages:
+        raise ValueError("no operations given")
+    return stages
+
+
+# adds a brightness / contrast / color factor as a fused "adjust" stage
+# it joins the previous adjust stage when that gives the same result, i.e.
+# when nothing that has to come after it is already set there
+def add_adjustment(stages, name, factor):
+    slot = ADJUST_SLOTS[name]
+    if stages and stages[-1][0] == "adjust":
+        args = list(stages[-1][1])
+        if all(f == 1.0 for f in args[slot:]):
+            args[slot] = factor
+            stages[-1] = ("adjust", tuple(args))
+            return
+    args = [1.0, 1.0, 1.0]
+    args[slot] = factor
+    stages.append(("adjust", tuple(args)))
+
+
+# yields (input path, output path) for every image under in_dir
+# the folder layout below in_dir is kept in out_dir
+def find_images(in_dir, out_dir):
+    extensions = Image.registered_extensions()
+    # an out_dir inside in_dir is skipped, or every run would process the
+    # results of the one before as new images
+    skip = os.path.realpath(out_dir)
+    for root, dirs, files in os.walk(in_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.realpath(os.path.join(root, d)) != skip)
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in extensions:
+                src = os.path.join(root, name)
+                yield src, os.path.join(out_dir, os.path.relpath(src, in_dir))
+
+
+# worker: applies the stages to one file, or copies the cached result
+# returns (input path, error message or None, True if it came from the cache)
+def process_file(job):
+    src, dst, stages, cache_dir = job
+    try:
+        os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+        if cache_dir:
+            cache = recipe.ResultCache(cache_dir)
+            key = cache.key(src, stages, os.path.splitext(dst)[1])
+            if cache.fetch(key, dst):
+                return src, None, True
+        with Image.open(src) as img:
+            fmt = saver.format_for(dst)
+            if frames.is_animated(img) and fmt in frames.MULTI_FRAME_FORMATS:
+                # the pool already runs one file per core, so the frames of
+                # a file run one after the other in its worker
+                source_frames, options = frames.read_frames(img)
+                rendered = frames.render_frames(source_frames, stages)
+                rendered[0].save(dst, fmt, **frames.save_frames_options(rendered, fmt, options))
+            else:
+                img = operations.editable(img)
+                img.load()
+                # the worker owns every intermediate image, so filters may
+                # overwrite them instead of allocating a second full copy
+                for stage in stages:
+                    img = operations.apply(img, stage, in_place=True)
+                if img.mode in ("RGBA", "LA") and os.path.splitext(dst)[1].lower() in (".jpg", ".jpeg"):
+                    img = img.convert("RGB")
+                img.save(dst)
+        if cache_dir:
+            cache.store(key, dst)
+        return src, None, False
+    except Exception as e:
+        return src, f"{type(e).__name__}: {e}", False
+
+
+# worker setup: caps how many pixels a worker will decode at once
+# the pool already keeps every core busy, so filters use a single thread
+def init_worker(max_megapixels):
+    tiles.WORKERS = 1
+    if max_megapixels:
+        Image.MAX_IMAGE_PIXELS = int(max_megapixels * 1_000_000)
+        # above MAX_IMAGE_PIXELS PIL only warns, turn that into an error
+        warnings.simplefilter("error", Image.DecompressionBombWarning)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="photo_editor batch", description="Apply photo editor operations to a folder of images.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--ops", help='comma separated operations, e.g. "brightness=1.2,rotate,blur"')
+    source.add_argument("--recipe", help="recipe file exported from the editor")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("--max-tasks-per-child", type=int, default=100,
+                        help="images a worker handles before it is replaced, which returns its memory (default: 100)")
+    parser.add_argument("--max-megapixels", type=float, default=None,
+                        help="refuse images larger than this instead of decoding them")
+    parser.add_argument("--cache-dir", default=recipe.RESULT_DIR, help="where cached results are kept")
+    parser.add_argument("--cache-mb", type=int, default=recipe.RESULT_BYTES // (1024 * 1024),
+                        help="size of the result cache, least recently used results go first (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="always process every image")
+    parser.add_argument("in_dir")
+    parser.add_argument("out_dir")
+    args = parser.parse_args(argv)
+
+    try:
+        stages = recipe.load_recipe(args.recipe) if args.recipe else parse_ops(args.ops)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if os.path.abspath(args.in_dir) == os.path.abspath(args.out_dir):
+        parser.error("out_dir must be different from in_dir")
+
+    cache = None if args.no_cache else recipe.ResultCache(args.cache_dir, args.cache_mb * 1024 * 1024)
+    cache_dir = cache.directory if cache else None
+    jobs = ((src, dst, stages, cache_dir) for src, dst in find_images(args.in_dir, args.out_dir))
+    done = failed = cached = 0
+    with multiprocessing.Pool(args.workers, initializer=init_worker, initargs=(args.max_megapixels,),
+                              maxtasksperchild=args.max_tasks_per_child) as pool:
+        for src, error, hit in pool.imap_unordered(process_file, jobs, chunksize=8):
+            done += 1
+            cached += hit
+            if error:
+                failed += 1
+                print(f"{src}: {error}", file=sys.stderr)
+            # workers only add to the cache, the main process trims it every
+            # EVICT_EVERY results, so a long run stays near --cache-mb
+            if cache and done % EVICT_EVERY == 0:
+                cache.evict()
+    if cache:
+        cache.evict()
+    print(f"processed {done} images, {cached} from the cache, {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
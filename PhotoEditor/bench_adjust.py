@@ -0,0 +1,78 @@
+# bench_adjust.py
+# Compares the fused adjust() kernel with the chained ImageEnhance passes.
+# Every case runs in its own process, so the peak memory of one case does not
+# hide the next one. Peak memory is how far the process's maximum resident
+# size rises above its resident size once the test image has been built.
+#
+# usage: python bench_adjust.py [megapixels ...]
+
+import resource
+import subprocess
+import sys
+import time
+
+from PIL import Image
+
+import kernels
+
+# megapixels -> image size, 4:3 like most camera sensors
+SIZES = {12: (4000, 3000), 24: (5657, 4243), 48: (8000, 6000)}
+FACTORS = (1.2, 1.3, 0.8)
+CASES = {"chained": kernels.adjust_chained, "fused": kernels.adjust}
+
+
+# builds a noisy RGB test image without going through numpy
+def make_image(size):
+    bands = [Image.effect_noise(size, sigma).point(lambda v, o=offset: v + o)
+             for sigma, offset in ((40, 0), (60, 20), (80, -20))]
+    return Image.merge("RGB", bands)
+
+
+# peak resident size of this process so far, in MB
+def peak_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / 1024 if sys.platform != "darwin" else peak / (1024 * 1024)
+
+
+# current resident size of this process in MB
+# falls back to the peak where /proc is not available
+def current_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / (1024 * 1024)
+    except OSError:
+        return peak_mb()
+
+
+# runs one case and prints "seconds peak_mb"
+def run_case(case, megapixels):
+    img = make_image(SIZES[megapixels])
+    before = current_mb()
+    start = time.perf_counter()
+    CASES[case](img, *FACTORS)
+    elapsed = time.perf_counter() - start
+    print(f"{elapsed:.4f} {peak_mb() - before:.1f}")
+
+
+def main(args):
+    if args[:1] == ["--case"]:
+        run_case(args[1], int(args[2]))
+        return
+    sizes = [int(a) for a in args] or sorted(SIZES)
+    print(f"{'MP':>4} {'chained s':>10} {'fused s':>9} {'chained MB':>11} {'fused MB':>9}")
+    for megapixels in sizes:
+        results = {}
+        for case in CASES:
+            out = subprocess.run(
+                [sys.executable, __file__, "--case", case, str(megapixels)],
+                capture_output=True, text=True, check=True,
+            ).stdout.split()
+            results[case] = (float(out[0]), float(out[1]))
+        print(f"{megapixels:>4} {results['chained'][0]:>10.3f} {results['fused'][0]:>9.3f} "
+              f"{results['chained'][1]:>11.1f} {results['fused'][1]:>9.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,259 @@
+# benchmark.py
+# Benchmarks every photo editor operation on synthetic images and checks the
+# results against a stored baseline.
+#
+# usage:
+#   python benchmark.py                      run, write benchmark_results.json
+#   python benchmark.py --save-baseline      run and store the results as the baseline
+#   python benchmark.py --sizes 1,4 --modes RGB --ops blur,rotate
+#
+# The exit status is 1 when an operation got slower (or used more memory)
+# than the baseline allows, so it can run as a check before a release.
+# A baseline from another machine, CPU count, Python or Pillow says nothing
+# about this run, so the comparison is refused with exit status 2 unless
+# --ignore-environment is given.
+# Times are the best of --repeat runs. Peak memory is the rise of the
+# process's peak resident size during one run, it needs Linux and is
+# reported as null elsewhere.
+
+import argparse
+import ctypes
+import ctypes.util
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+from PIL import Image
+
+import operations
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, "benchmark_baseline.json")
+RESULTS = os.path.join(HERE, "benchmark_results.json")
+
+
+# saves img to memory in the given format, like the Save button does to disk
+def save_to_memory(img, fmt):
+    buffer = io.BytesIO()
+    img.save(buffer, fmt)
+    return buffer
+
+
+# operation name -> function of the image
+CASES = {
+    "brightness": lambda img: operations.adjust(img, brightness=1.2),
+    "contrast": lambda img: operations.adjust(img, contrast=1.2),
+    "color": lambda img: operations.adjust(img, color=1.2),
+    "sharpness": lambda img: operations.enhance(img, "sharpness", 1.5),
+    "rotate": operations.rotate,
+    "flip": operations.flip,
+    "blur": operations.blur,
+    "blur_radius_20": lambda img: operations.blur(img, 20),
+    "emboss": operations.emboss,
+    "find_edges": operations.find_edges,
+    "resize": lambda img: operations.resize(img, (img.width // 2, img.height // 2)),
+    "crop": lambda img: operations.crop(img, (img.width // 4, img.height // 4, img.width * 3 // 4, img.height * 3 // 4)),
+    "save_png": lambda img: save_to_memory(img, "PNG"),
+    "save_jpeg": lambda img: save_to_memory(img, "JPEG"),
+}
+
+# JPEG has no alpha channel
+SKIP = {("save_jpeg", "RGBA")}
+
+
+# builds a noisy test image of about megapixels in the given mode
+def make_image(megapixels, mode):
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    size = (width, int(megapixels * 1_000_000 / width))
+    bands = [Image.effect_noise(size, 30 + 20 * i) for i in range(len(Image.new(mode, (1, 1)).getbands()))]
+    return Image.merge(mode, bands)
+
+
+# peak resident size in MB, or None where /proc is not available
+def peak_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+# resident size in MB right now, or None where /proc is not available
+def current_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+# gives memory freed by earlier cases back to the OS, otherwise the next
+# case reuses it and its peak does not show up in the resident size
+def release_memory():
+    Image.core.clear_cache()
+    libc = ctypes.util.find_library("c")
+    if libc and sys.platform.startswith("linux"):
+        try:
+            ctypes.CDLL(libc).malloc_trim(0)
+        except AttributeError:
+            # not glibc
+            pass
+
+
+# resets the peak resident size to the current size (Linux only)
+def reset_peak():
+    release_memory()
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+# runs one case and returns (best seconds, peak memory rise in MB or None)
+def measure(func, img, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(img)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    memory = None
+    if reset_peak():
+        before = current_mb()
+        result = func(img)
+        after = peak_mb()
+        del result
+        if before is not None and after is not None:
+            memory = max(0.0, after - before)
+    return best, memory
+
+
+def run(sizes, modes, names, repeat):
+    results = []
+    for megapixels in sizes:
+        for mode in modes:
+            img = make_image(megapixels, mode)
+            for name in names:
+                if (name, mode) in SKIP:
+                    continue
+                seconds, memory = measure(CASES[name], img, repeat)
+                results.append({"op": name, "mode": mode, "megapixels": megapixels,
+                                "seconds": round(seconds, 6),
+                                "peak_mb": None if memory is None else round(memory, 2)})
+                print(f"{name:>14} {mode:>4} {megapixels:>5g} MP {seconds * 1000:9.2f} ms "
+                      f"{'-' if memory is None else f'{memory:8.1f} MB'}")
+    return results
+
+
+# key of a result in the baseline
+def result_key(result):
+    return (result["op"], result["mode"], result["megapixels"])
+
+
+# compares results with the baseline, returns a list of regression messages
+# a result regresses when it is more than tolerance (a fraction) worse
+# than the baseline, plus a small absolute slack against timer noise
+def regressions(results, baseline, tolerance, slack_ms=2.0, slack_mb=4.0):
+    previous = {result_key(r): r for r in baseline["results"]}
+    messages = []
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None:
+            continue
+        name = "{} {} {:g} MP".format(*result_key(result))
+        limit = old["seconds"] * (1 + tolerance) + slack_ms / 1000
+        if result["seconds"] > limit:
+            messages.append(f"{name}: {result['seconds'] * 1000:.2f} ms, baseline {old['seconds'] * 1000:.2f} ms")
+        if result["peak_mb"] is not None and old.get("peak_mb") is not None:
+            limit = old["peak_mb"] * (1 + tolerance) + slack_mb
+            if result["peak_mb"] > limit:
+                messages.append(f"{name}: {result['peak_mb']:.1f} MB, baseline {old['peak_mb']:.1f} MB")
+    return messages
+
+
+# the fields of a run that have to match the baseline for a fair comparison
+ENVIRONMENT_FIELDS = ("machine", "cpus", "python", "pillow")
+
+
+# returns a message for every environment field that differs from the baseline
+def environment_changes(data, baseline):
+    return [f"{field}: baseline {baseline.get(field)}, this run {data[field]}"
+            for field in ENVIRONMENT_FIELDS if baseline.get(field) != data[field]]
+
+
+# writes data as JSON to path
+def write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the photo editor operations.")
+    parser.add_argument("--sizes", default="1,4,12", help="image sizes in megapixels (default: 1,4,12)")
+    parser.add_argument("--modes", default="RGB,RGBA,L", help="image modes (default: RGB,RGBA,L)")
+    parser.add_argument("--ops", default=",".join(CASES), help="operations to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case, the best one counts (default: 3)")
+    parser.add_argument("--output", default=RESULTS, help="where to write the results")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown as a fraction of the baseline (default: 0.25)")
+    parser.add_argument("--ignore-environment", action="store_true",
+                        help="compare with a baseline recorded on another machine or setup anyway")
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.ops.split(",") if n.strip()]
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        parser.error(f"unknown operation: {', '.join(unknown)}")
+    sizes = [float(s) for s in args.sizes.split(",")]
+    modes = [m.strip() for m in args.modes.split(",")]
+
+    data = {
+        "python": platform.python_version(),
+        "pillow": Image.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": run(sizes, modes, names, args.repeat),
+    }
+    write_json(args.output, data)
+    print(f"results written to {args.output}")
+
+    if args.save_baseline:
+        write_json(args.baseline, data)
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("no baseline yet, run with --save-baseline to store one")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    changes = environment_changes(data, baseline)
+    for change in changes:
+        print(f"ENVIRONMENT {change}", file=sys.stderr)
+    if changes and not args.ignore_environment:
+        print("the baseline was recorded elsewhere, store a new one with --save-baseline "
+              "or compare anyway with --ignore-environment", file=sys.stderr)
+        return 2
+    messages = regressions(data["results"], baseline, args.tolerance)
+    for message in messages:
+        print(f"REGRESSION {message}", file=sys.stderr)
+    if messages:
+        return 1
+    print("no regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
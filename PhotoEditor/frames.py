@@ -0,0 +1,112 @@
+# frames.py
+# Multi-frame images for the photo editor: animated GIF, WebP and PNG, and
+# multi-page TIFF.
+# Image.open() only shows the first frame. read_frames() decodes all of
+# them, render_frames() runs the edit stages on every frame and
+# save_frames_options() saves them with the original frame durations and
+# loop count.
+# The frames are independent, so they are spread over worker processes.
+# The brightness / contrast lookup table of an "adjust" stage is worked out
+# once, from the histograms of all frames together, and the same table is
+# sent to every frame. That also keeps the contrast from flickering between
+# frames.
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import ImageSequence
+
+import kernels
+import operations
+import tiles
+
+# formats that can store more than one frame
+MULTI_FRAME_FORMATS = ("GIF", "WEBP", "PNG", "TIFF")
+
+
+# True if img has more than one frame
+def is_animated(img):
+    return getattr(img, "n_frames", 1) > 1
+
+
+# decodes every frame of img as an editable image
+# returns (frames, save options with the frame durations and loop count)
+def read_frames(img):
+    frames = []
+    durations = []
+    for frame in ImageSequence.Iterator(img):
+        # WebP only knows the duration once the frame is loaded
+        frame.load()
+        durations.append(frame.info.get("duration", 0))
+        frames.append(operations.editable(frame.copy()))
+    img.seek(0)
+    options = {"duration": durations}
+    if "loop" in img.info:
+        options["loop"] = img.info["loop"]
+    return frames, options
+
+
+# runs the stages on every frame, using map_func to spread the frames out
+# (the builtin map runs them one after the other)
+# progress(done) is called with the number of stages finished so far
+def render_frames(frames, stages, map_func=map, progress=None):
+    steps = []
+    for done, stage in enumerate(stages):
+        name, args = stage
+        lut = None
+        if name == "adjust":
+            brightness, contrast, _ = args
+            lut = kernels.blend_lut(0, brightness)
+            if contrast != 1.0:
+                # the contrast mean needs the frames as they are at this
+                # stage, so the stages before it are run first
+                frames = list(map_func(run_steps, [(frame, steps) for frame in frames]))
+                steps = []
+                if progress:
+                    progress(done)
+                histogram = sum(map_func(frame_histogram, [(frame, lut) for frame in frames]))
+                lut = kernels.contrast_lut(histogram, lut, contrast)
+        steps.append((stage, lut))
+    frames = list(map_func(run_steps, [(frame, steps) for frame in frames]))
+    if progress:
+        progress(len(stages))
+    return frames
+
+
+# worker: runs (stage, shared lut or None) steps on one frame
+def run_steps(job):
+    frame, steps = job
+    for stage, lut in steps:
+        if lut is not None:
+            frame = kernels.adjust(frame, color=stage[1][2], lut=lut)
+        else:
+            # every frame is a private copy, filters may overwrite it
+            frame = operations.apply(frame, stage, in_place=True)
+    return frame
+
+
+# worker: luma histogram of one frame after lut
+def frame_histogram(job):
+    frame, lut = job
+    return kernels.luma_histogram(frame, lut)
+
+
+# worker setup: the frames already keep every core busy
+def init_worker():
+    tiles.WORKERS = 1
+
+
+# a pool to pass to render_frames() as its map_func
+# the workers are spawned, never forked: the editor has a render thread, a
+# save thread and a Tk connection, and a forked copy of those can hang;
+# photo_editor.py only opens its window when it is the main script
+def frame_pool():
+    return ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"), initializer=init_worker)
+
+
+# save() options that write frames as one multi-frame file
+# formats that only hold one frame get the first frame alone
+def save_frames_options(frames, fmt, options):
+    if fmt not in MULTI_FRAME_FORMATS or len(frames) < 2:
+        return {}
+    return dict(options, save_all=True, append_images=frames[1:])
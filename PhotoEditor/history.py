@@ -0,0 +1,42 @@
+# history.py
+# Undo / redo for the photo editor.
+# Each undo step only stores the pipeline's edit state (the list of stages
+# and the slider values), never an image. Going back to a state re-renders
+# it from the pipeline's checkpoints, so the memory for the images is capped
+# by the pipeline's max_cache_bytes however deep the history gets.
+
+
+class EditHistory:
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.undo_stack = []
+        self.redo_stack = []
+        # the slider being dragged, so one drag becomes one undo step
+        self._slider = None
+
+    # saves the current state, call it just before making an edit
+    # consecutive moves of the same slider are merged into one step
+    def record(self, slider=None):
+        if slider is not None and slider == self._slider:
+            return
+        self._slider = slider
+        self.undo_stack.append(self.pipeline.snapshot())
+        self.redo_stack.clear()
+
+    # goes back one step, returns False if there is nothing to undo
+    def undo(self):
+        if not self.undo_stack:
+            return False
+        self.redo_stack.append(self.pipeline.snapshot())
+        self.pipeline.restore(self.undo_stack.pop())
+        self._slider = None
+        return True
+
+    # goes forward one step, returns False if there is nothing to redo
+    def redo(self):
+        if not self.redo_stack:
+            return False
+        self.undo_stack.append(self.pipeline.snapshot())
+        self.pipeline.restore(self.redo_stack.pop())
+        self._slider = None
+        return True
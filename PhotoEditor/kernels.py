@@ -0,0 +1,102 @@
+# kernels.py
+# Fused brightness / contrast / saturation adjustment for the photo editor.
+# Chaining ImageEnhance.Brightness, Contrast and Color makes three passes
+# over the image, and each one allocates a full size "degenerate" image and a
+# full size result. adjust() gives the same pixels with less work:
+#  - brightness and contrast are point operations, so they are folded into
+#    one 256 entry lookup table per band, built with numpy
+#  - saturation blends every pixel with its own luma, like ImageEnhance.Color
+# The pixels are processed in chunks of rows with PIL's C operations, so the
+# only full size allocation is the result image. The contrast mean needs one
+# extra read of the pixels, just like ImageEnhance.Contrast does.
+
+import numpy as np
+from PIL import Image, ImageEnhance
+
+# number of pixels handled per chunk of rows
+CHUNK_PIXELS = 1 << 20
+
+
+# lookup table for Image.blend(solid base, img, factor) on one band
+# mirrors PIL: float32 math, then truncated and clipped to 0..255
+def blend_lut(base, factor):
+    values = np.arange(256, dtype=np.float32)
+    base = np.float32(base)
+    out = base + np.float32(factor) * (values - base)
+    return np.clip(out, 0, 255).astype(np.uint8)
+
+
+# lookup table for brightness followed by contrast
+# the contrast mean is the mean luma of the brightened image, like
+# ImageEnhance.Contrast sees it when the enhancers are chained
+def point_lut(img, brightness, contrast):
+    lut = blend_lut(0, brightness)
+    if contrast != 1.0:
+        lut = contrast_lut(luma_histogram(img, lut), lut, contrast)
+    return lut
+
+
+# adds contrast around the mean of histogram on top of lut
+# histogram may be summed over several images, e.g. every animation frame
+def contrast_lut(histogram, lut, contrast):
+    mean = int((histogram * np.arange(256)).sum() / max(1, histogram.sum()) + 0.5)
+    return blend_lut(mean, contrast)[lut]
+
+
+# histogram of convert("L") after applying lut to every colour band
+# worked out one chunk of rows at a time, so no full size copy is made
+def luma_histogram(img, lut):
+    table = band_table(img, lut)
+    histogram = np.zeros(256, dtype=np.int64)
+    for box in row_chunks(img):
+        histogram += img.crop(box).point(table).convert("L").histogram()
+    return histogram
+
+
+# point() table applying lut to every band except alpha
+# the alpha band is never changed by the enhancers
+def band_table(img, lut):
+    identity = list(range(256))
+    table = []
+    for band in img.getbands():
+        table += identity if band == "A" else lut.tolist()
+    return table
+
+
+# blends a chunk with its own luma, like ImageEnhance.Color
+def saturate(chunk, color):
+    gray_mode = "LA" if chunk.mode == "RGBA" else "L"
+    gray = chunk.convert(gray_mode).convert(chunk.mode)
+    return Image.blend(gray, chunk, color)
+
+
+# (left, top, right, bottom) boxes covering img, CHUNK_PIXELS at a time
+def row_chunks(img):
+    rows = max(1, CHUNK_PIXELS // max(1, img.width))
+    for top in range(0, img.height, rows):
+        yield (0, top, img.width, min(img.height, top + rows))
+
+
+# applies brightness, contrast and color (saturation) in that order
+# gives the same pixels as chaining the three ImageEnhance classes
+# lut is a ready made point_lut(), e.g. one shared by all animation frames
+def adjust(img, brightness=1.0, contrast=1.0, color=1.0, lut=None):
+    if img.mode not in ("L", "LA", "RGB", "RGBA"):
+        return adjust_chained(img, brightness, contrast, color)
+    if lut is None:
+        lut = point_lut(img, brightness, contrast)
+    table = band_table(img, lut)
+    if color == 1.0 or img.mode in ("L", "LA"):
+        # no saturation change, a single point() pass is enough
+        return img.point(table)
+    out = Image.new(img.mode, img.size)
+    for box in row_chunks(img):
+        out.paste(saturate(img.crop(box).point(table), color), box[:2])
+    return out
+
+
+# the reference implementation: three separate ImageEnhance passes
+def adjust_chained(img, brightness=1.0, contrast=1.0, color=1.0):
+    img = ImageEnhance.Brightness(img).enhance(brightness)
+    img = ImageEnhance.Contrast(img).enhance(contrast)
+    return ImageEnhance.Color(img).enhance(color)
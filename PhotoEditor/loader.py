@@ -0,0 +1,88 @@
+# loader.py
+# Fast image opening for the photo editor preview.
+# The panel only shows about 600 x 700 pixels, so there is no need to decode
+# a 24 MP photo in full just to look at it:
+#  - JPEGs are decoded at 1/2, 1/4 or 1/8 scale with Image.draft()
+#  - other formats are shrunk with Image.reduce() right after decoding
+# The preview is also written to an on-disk thumbnail cache, keyed by the
+# file's path, modification time and size, so reopening a recent image only
+# reads a small PNG.
+
+import hashlib
+import os
+
+from PIL import Image
+
+import operations
+from pipeline import make_proxy
+
+# where the cached previews are kept
+THUMB_DIR = os.path.join(os.path.expanduser("~"), ".cache", "photo_editor", "thumbs")
+
+# how many cached previews to keep, the oldest are deleted first
+THUMB_LIMIT = 200
+
+
+# name of the cached preview of path at size
+# changes whenever the file is modified or replaced
+def cache_key(path, size):
+    stat = os.stat(path)
+    text = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{size[0]}x{size[1]}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+# returns a preview of the image at path that fits inside size
+# the full image is never decoded when the preview is in the cache
+def open_preview(path, size, cache_dir=THUMB_DIR):
+    cached = os.path.join(cache_dir, cache_key(path, size) + ".png")
+    if os.path.exists(cached):
+        try:
+            with Image.open(cached) as img:
+                img.load()
+            # mark it as recently used for prune()
+            os.utime(cached)
+            return img
+        except OSError:
+            pass
+    preview = decode_preview(path, size)
+    store_preview(preview, cached)
+    return preview
+
+
+# decodes the image at path at reduced resolution and fits it inside size
+def decode_preview(path, size):
+    with Image.open(path) as img:
+        ratio = min(size[0] / img.width, size[1] / img.height, 1)
+        target = (max(1, round(img.width * ratio)), max(1, round(img.height * ratio)))
+        # only JPEG supports draft, other formats ignore it
+        if img.mode in ("L", "RGB"):
+            img.draft(img.mode, target)
+        img.load()
+        factor = min(img.width // target[0], img.height // target[1])
+        preview = img.reduce(factor) if factor > 1 else img.copy()
+    return make_proxy(operations.editable(preview), size)
+
+
+# writes preview to the cache, a failed write only costs the next open
+def store_preview(preview, cached):
+    try:
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        temp = cached + ".tmp"
+        preview.save(temp, "PNG", compress_level=1)
+        os.replace(temp, cached)
+        prune(os.path.dirname(cached))
+    except OSError:
+        pass
+
+
+# deletes the oldest previews once there are more than THUMB_LIMIT
+def prune(cache_dir):
+    entries = [e for e in os.scandir(cache_dir) if e.name.endswith(".png")]
+    if len(entries) <= THUMB_LIMIT:
+        return
+    entries.sort(key=lambda e: e.stat().st_mtime)
+    for entry in entries[:len(entries) - THUMB_LIMIT]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
@@ -0,0 +1,130 @@
+# operations.py
+# The image operations behind the photo editor buttons and sliders.
+# Nothing in here touches tkinter, so the editor pipeline can call them
+# with any PIL image.
+
+from PIL import Image, ImageEnhance, ImageFilter
+
+import kernels
+import tiles
+
+# slider adjustments, keyed by the name used in the edit pipeline
+ENHANCERS = {
+    "brightness": ImageEnhance.Brightness,
+    "contrast": ImageEnhance.Contrast,
+    "sharpness": ImageEnhance.Sharpness,
+    "color": ImageEnhance.Color,
+}
+
+
+# modes every operation and enhancer can work on
+EDITABLE_MODES = ("L", "LA", "RGB", "RGBA")
+
+
+# converts palette, bilevel, CMYK etc. images to L / RGB, keeping alpha
+# images that are already editable are returned unchanged
+def editable(img):
+    if img.mode in EDITABLE_MODES:
+        return img
+    has_alpha = "A" in img.getbands() or "transparency" in img.info
+    if img.mode in ("1", "I", "I;16", "F"):
+        return img.convert("LA" if has_alpha else "L")
+    return img.convert("RGBA" if has_alpha else "RGB")
+
+
+# applies one of the slider enhancers with the given factor
+def enhance(img, name, factor):
+    return ENHANCERS[name](img).enhance(factor)
+
+
+# applies the brightness, contrast and color sliders in one fused pass
+def adjust(img, brightness=1.0, contrast=1.0, color=1.0):
+    return kernels.adjust(img, brightness, contrast, color)
+
+
+# rotates the image by 90 degrees
+def rotate(img):
+    return img.rotate(90)
+
+
+# mirrors the image left to right
+def flip(img):
+    return img.transpose(Image.FLIP_LEFT_RIGHT)
+
+
+# the filters below run tile by tile, see tiles.py
+# in_place=True lets them overwrite img when the caller owns it
+
+# applies a blur filter to the image
+# with a radius this is a Gaussian blur, which PIL runs as three box blurs
+# with running sums, so it costs the same for any radius
+# without one it is the fixed ImageFilter.BLUR kernel
+def blur(img, radius=None, in_place=False):
+    filt = ImageFilter.BLUR if radius is None else ImageFilter.GaussianBlur(radius)
+    return tiles.filter_tiled(img, filt, in_place=in_place)
+
+
+# applies an emboss filter to the image
+def emboss(img, in_place=False):
+    return tiles.filter_tiled(img, ImageFilter.EMBOSS, in_place=in_place)
+
+
+# finds the edges of the image
+def find_edges(img, in_place=False):
+    return tiles.filter_tiled(img, ImageFilter.FIND_EDGES, in_place=in_place)
+
+
+# resizes the image, 200 x 300 by default like the Resize button
+def resize(img, size=(200, 300)):
+    return img.resize(size)
+
+
+# crops the image, (100, 100, 400, 400) by default like the Crop button
+def crop(img, box=(100, 100, 400, 400)):
+    return img.crop(box)
+
+
+# operations that accept in_place
+FILTERS = ("blur", "emboss", "find_edges")
+
+# geometric operations and filters, keyed by their pipeline name
+OPERATIONS = {
+    "rotate": rotate,
+    "flip": flip,
+    "blur": blur,
+    "emboss": emboss,
+    "find_edges": find_edges,
+    "resize": resize,
+    "crop": crop,
+}
+
+
+# rescales the pixel arguments of a stage recorded on a downscaled proxy
+# so it can be replayed on an image sx times wider and sy times taller
+def scale_stage(stage, sx, sy):
+    name, args = stage
+    if name == "crop":
+        box = args[0] if args else (100, 100, 400, 400)
+        left, top, right, bottom = box
+        return (name, ((round(left * sx), round(top * sy), round(right * sx), round(bottom * sy)),))
+    if name == "resize":
+        width, height = args[0] if args else (200, 300)
+        return (name, ((max(1, round(width * sx)), max(1, round(height * sy))),))
+    if name == "blur" and args and args[0] is not None:
+        return (name, (args[0] * (sx + sy) / 2,))
+    return stage
+
+
+# runs one pipeline stage on img
+# a stage is a (name, args) tuple, e.g. ("crop", ((0, 0, 10, 10),)),
+# ("sharpness", (1.2,)) or ("adjust", (brightness, contrast, color))
+# in_place=True allows filters to overwrite img instead of copying it
+def apply(img, stage, in_place=False):
+    name, args = stage
+    if name == "adjust":
+        return adjust(img, *args)
+    if name in ENHANCERS:
+        return enhance(img, name, *args)
+    if name in FILTERS:
+        return OPERATIONS[name](img, *args, in_place=in_place)
+    return OPERATIONS[name](img, *args)
@@ -1,277 +1,466 @@
 #importing the required modules 
+import os
+import runpy
+import sys
+
+# "python photo_editor.py batch ..." runs the headless batch mode from
+# batch.py instead of opening the editor window
+# run_path makes batch.py the __main__ module, so its worker processes
+# never import this file and open a window of their own
+# this comes before the tkinter imports, so batch mode also works on a
+# server without Tk
+if __name__ == "__main__" and sys.argv[1:2] == ["batch"]:
+    sys.argv = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "batch.py")] + sys.argv[2:]
+    runpy.run_path(sys.argv[0], run_name="__main__")
+    sys.exit()
+
 from tkinter import *
 from tkinter import ttk
 #importing PIL i.e pillow module
-from PIL import ImageTk, Image, ImageEnhance, ImageFilter
-from tkinter import filedialog
-import os
+from PIL import ImageTk, Image
+from tkinter import filedialog, messagebox
+import operations
+import recipe
+import saver
+from history import EditHistory
+from loader import open_preview
+from pipeline import EditPipeline
+from render_worker import RenderWorker
+
+# the Tk image shown in the panel and its mode
+# it is only created again when the size or mode of the frames changes,
+# every other frame is pasted into it in place
+display_surface = None
+display_mode = None
+
+# the BackgroundSave in progress, if any, and whether the window closes
+# as soon as it is done
+current_save = None
+close_after_save = False
 
 # function to display this image
 # and updating the panel widget to show this image
 def displayimage(img):
-    dispimage = ImageTk.PhotoImage(img)
-    panel.configure(image=dispimage)
-    panel.image = dispimage
+    global display_surface, display_mode
+    mode = "RGBA" if "A" in img.getbands() else "RGB"
+    if (display_surface is None or mode != display_mode
+            or (display_surface.width(), display_surface.height()) != img.size):
+        display_surface = ImageTk.PhotoImage(mode, img.size)
+        display_mode = mode
+        panel.configure(image=display_surface)
+        panel.image = display_surface
+    display_surface.paste(img)
+
+# asks the render worker to redraw the current pipeline
+# the result is shown by displayimage once it is ready, so the
+# window stays responsive while a slider is dragged
+def refresh():
+    renderer.submit(pipeline)
+
+# records a slider move in the history and redraws the pipeline
+# slider.set() from undo, redo and reset calls this too, but then the
+# pipeline already has the value and nothing is recorded
+def slider_moved(name, factor):
+    if pipeline.factors[name] == float(factor):
+        return
+    history.record(slider=name)
+    pipeline.set_adjustment(name, factor)
+    refresh()
+
+# records an operation or filter in the history, adds it to the
+# pipeline and redraws
+def add_edit(name, *args):
+    history.record()
+    pipeline.add_op(name, *args)
+    refresh()
 # function for brightness slider
 #this function adjusts the brightness of an image
-#and updates outputImage
+#and redraws the pipeline
 def brightness_callback(brightness_pos):
     brightness_pos = float(brightness_pos)
-    global outputImage
-    enhancer = ImageEnhance.Brightness(img)
-    outputImage = enhancer.enhance(brightness_pos)
-    displayimage(outputImage)
+    slider_moved("brightness", brightness_pos)
 
 
 # function for contrast slider
-# and updates the output image
+# and redraws the pipeline
 def contrast_callback(contrast_pos):
     contrast_pos = float(contrast_pos)
-    global outputImage
-    enhancer = ImageEnhance.Contrast(img)
-    outputImage = enhancer.enhance(contrast_pos)
-    displayimage(outputImage)
+    slider_moved("contrast", contrast_pos)
 
 # function for sharpness slider
-#and updates the outputImage
+#and redraws the pipeline
 def sharpen_callback(sharpness_pos):
     sharpness_pos = float(sharpness_pos)
-    global outputImage
-    enhancer = ImageEnhance.Sharpness(img)
-    outputImage = enhancer.enhance(sharpness_pos)
-    displayimage(outputImage)
+    slider_moved("sharpness", sharpness_pos)
 
 # function for color slider
-# and updates the outputImage
+# and redraws the pipeline
 def color_callback(Color_pos):
     Color_pos = float(Color_pos)
     #print(Color_pos)
-    global outputImage
-    enhancer = ImageEnhance.Color(img)
-    outputImage = enhancer.enhance(Color_pos)
-    displayimage(outputImage)
-# updates the img variable 
+    slider_moved("color", Color_pos)
+# adds a rotate stage to the pipeline
 #displays the image using the 'displayimage' function
 def rotate():
-    global img
-    img = img.rotate(90)
-    displayimage(img)
+    add_edit("rotate")
 # Function to flip the image
 #displays the image using the 'displayimage' function
 def flip():
-    global img
-    img = img.transpose((Image.FLIP_LEFT_RIGHT))
-    displayimage(img)
+    add_edit("flip")
 
 # function to Blur the image 
-# This function applies a blur filter to the image
-# updates the img variable 
+# This function adds a blur stage with the radius from the blur slider
+# a big radius costs the same as a small one, so one click is enough
 #displays the image using the 'displayimage' function
 def blurr():
-    global img
-    img = img.filter(ImageFilter.BLUR)
-    displayimage(img)
+    add_edit("blur", float(blurSlider.get()))
 
 # function to emboss the image
-# this function applies a emboss filter to the image
-# updates the img variable 
+# this function adds a emboss filter stage to the pipeline
 #displays the image using the 'displayimage' function
 def emboss():
-    global img
-    img = img.filter(ImageFilter.EMBOSS)
-    displayimage(img)
+    add_edit("emboss")
 
 # this function enhances the edges of the image using a filter
 #displays the image using the 'displayimage' function
 def edgeEnhance():
-    global img
-    img = img.filter(ImageFilter.FIND_EDGES)
-    displayimage(img)
+    add_edit("find_edges")
 
 # function to resize the button
 #displays the image using the 'displayimage' function
 def resize():
-    global img
-    img = img.resize((200, 300))
-    displayimage(img)
-# updates the img variable 
+    add_edit("resize", (200, 300))
+# adds a crop stage to the pipeline
 #displays the image using the 'displayimage' function
 def crop():
-    global img
-    img = img.crop((100, 100, 400, 400))
-    displayimage(img)
+    add_edit("crop", (100, 100, 400, 400))
 
 # function to reset the button
-# this function closes the current tkinter window
+# this function drops every edit, it can be undone like any other edit
 def reset():
-    mains.destroy()
-    os.popen("photo_editor.py")
+    history.record()
+    pipeline.reset()
+    sync_sliders()
+    refresh()
+
+# function for the undo button
+# goes back one edit
+def undo():
+    if history.undo():
+        sync_sliders()
+        refresh()
+
+# function for the redo button
+# goes forward one edit again
+def redo():
+    if history.redo():
+        sync_sliders()
+        refresh()
 
 # this function allows user to change the image
 #displays the image using the 'displayimage' function
 def ChangeImg():
-    global img
+    global pipeline, history
     imgname = filedialog.askopenfilename(title="Change Image")
     if imgname:
+        # the full image is only opened here, it is decoded on save
         img = Image.open(imgname)
-        img = img.resize((600, 600))
-        displayimage(img)
+        pipeline = EditPipeline(img, PANEL_SIZE, proxy=open_preview(imgname, PANEL_SIZE))
+        history = EditHistory(pipeline)
+        sync_sliders()
+        refresh()
+
+# moves the sliders to the values in the pipeline
+def sync_sliders():
+    brightnessSlider.set(pipeline.factors["brightness"])
+    contrastSlider.set(pipeline.factors["contrast"])
+    sharpnessSlider.set(pipeline.factors["sharpness"])
+    colorSlider.set(pipeline.factors["color"])
 # function to save the image
-# this function allows user to save the currently displayed image
-# the outputImage is then saved to the selected file.
+# this function asks for a file name and the encoder options, then the
+# edits are replayed on the full resolution image and saved to the
+# selected file on a background thread, so the window keeps working
 def save():
-    global img
-    savefile = filedialog.asksaveasfile(defaultextension=".jpg")
-    outputImage.save(savefile)
-    
+    path = filedialog.asksaveasfilename(defaultextension=".jpg", filetypes=[
+        ("JPEG", "*.jpg *.jpeg"), ("PNG", "*.png"), ("WebP", "*.webp"), ("All files", "*.*")])
+    if not path:
+        return
+    fmt = saver.format_for(path)
+    if fmt is None:
+        messagebox.showerror("Save", f"Unknown file type:\n{path}")
+        return
+    ask_encoder_options(fmt, lambda options: start_save(path, dict(options, fmt=fmt)))
+
+# shows a dialog with the encoder options of fmt
+# on_ok gets the chosen options, formats without options skip the dialog
+def ask_encoder_options(fmt, on_ok):
+    defaults = saver.FORMATS.get(fmt)
+    if not defaults:
+        on_ok({})
+        return
+    dialog = Toplevel(mains)
+    dialog.title(f"{fmt} options")
+    dialog.configure(bg="#323946")
+    dialog.transient(mains)
+    dialog.grab_set()
+    variables = {}
+    for row, (name, default) in enumerate(defaults.items()):
+        label = name.replace("_", " ").title()
+        if isinstance(default, bool):
+            var = BooleanVar(value=default)
+            widget = Checkbutton(dialog, text=label, variable=var, bg="#1f242d", foreground='white',
+                                 selectcolor="#323946", activebackground="ORANGE")
+        else:
+            var = IntVar(value=default)
+            high = 9 if name == "compress_level" else 100
+            widget = Scale(dialog, label=label, variable=var, from_=0, to=high, orient=HORIZONTAL,
+                           length=200, bg="#1f242d", foreground='white')
+        widget.configure(font=('poppins',10,'bold'))
+        widget.grid(row=row, column=0, sticky="we", padx=12, pady=4)
+        variables[name] = var
+
+    def ok():
+        options = {name: var.get() for name, var in variables.items()}
+        dialog.destroy()
+        on_ok(options)
+    btnOk = Button(dialog, text="Save", command=ok, bg="black", foreground='white', activebackground="ORANGE")
+    btnOk.configure(font=('poppins',10,'bold'))
+    btnOk.grid(row=len(defaults), column=0, pady=8)
+
+# starts saving the current edits in the background
+# the Save button is disabled and the progress bar shown until it is done
+def start_save(path, options):
+    global current_save
+    btnSave.configure(state=DISABLED)
+    saveProgress.configure(value=0)
+    saveProgress.place(x=805,y=720)
+    current_save = saver.BackgroundSave(mains, pipeline, path, options, save_progress, save_done)
+
+# moves the progress bar, called on the mainloop
+def save_progress(done, total):
+    saveProgress.configure(maximum=total, value=done)
+
+# called on the mainloop when the background save has finished
+def save_done(error):
+    global current_save
+    current_save = None
+    btnSave.configure(state=NORMAL)
+    saveProgress.place_forget()
+    if error is not None:
+        messagebox.showerror("Save", f"Could not save the image:\n{error}")
+    if close_after_save:
+        close()
+
+# writes the current edits to a recipe file, which batch.py --recipe
+# replays on other images
+# the stages are scaled from the preview to the full image first, so crop
+# boxes and sizes mean the same pixels as in the saved image
+def export_recipe():
+    path = filedialog.asksaveasfilename(title="Export Recipe", defaultextension=".json",
+                                        filetypes=[("Recipe", "*.json"), ("All files", "*.*")])
+    if not path:
+        return
+    stages = [operations.scale_stage(stage, *pipeline.scale) for stage in pipeline.stages()]
+    try:
+        recipe.save_recipe(stages, path)
+    except OSError as e:
+        messagebox.showerror("Export Recipe", f"Could not write the recipe:\n{e}")
+
 #this function is to close the main tkinter window.
+#while a save is running the window stays open until it is done, closing
+#it would kill the save and leave a half written temporary file behind
 def close():
+    global close_after_save
+    if current_save is not None and current_save.running():
+        if messagebox.askokcancel("Close", "The image is still being saved.\nClose the editor when the save has finished?"):
+            close_after_save = True
+            mains.title(f"{space}Image Editor - closing after the save")
+        return
+    renderer.stop()
     mains.destroy()
 
-# Creating the window for image editor
-# Calling the TK
-mains = Tk()
-
-# Add an icon photo
-photo_editor_icon = PhotoImage(file='photo_editor_icon.png')
-mains.iconphoto(True,photo_editor_icon)
-
-# creating a string of 215 space characters
-space=(" ")*215
-# It retrieves the screen width of the user's display
-screen_width=mains.winfo_screenwidth()
-
-# It retrieves the screen height of the user's display
-screen_height = mains.winfo_screenheight()
-
-#Using an f-string to construct the window size in the 
-#format width x height
-mains.geometry(f"{screen_width}x{screen_height}")
-#setting the title for the window
-mains.title(f"{space}Image Editor")
-mains.configure(bg='#323946')
-
-
-# Default image
-img = Image.open("logo.png")
-# "logo.png" image will be available after this code
-# To run this code, this image must be saved in your PC's or you should change 
-# the "logo.png" to your image name in this code.
-
-#resizing the image to 600 x 700
-img = img.resize((600, 700))
-panel = Label(mains)
-panel.grid(row=0, column=0, rowspan=12, padx=50, pady=50)
-displayimage(img)
-
-#brightnessSlider stores the scale widget
-#Inside the widget,
-
-brightnessSlider = Scale(mains, label="Brightness", from_=0, to=2, orient=HORIZONTAL, length=200,
-                         resolution=0.1, command=brightness_callback, bg="#1f242d")
-#initially, color position set to 1
-brightnessSlider.set(1)
-#setting the font style, font size, weight
-brightnessSlider.configure(font=('poppins',11,'bold'),foreground='white')
-brightnessSlider.place(x=1070,y=15)
-
-
-#contrastSlider stores the scale widget
-#length determines the length of the slider
-contrastSlider = Scale(mains, label="Contrast", from_=0, to=2, orient=HORIZONTAL, length=200,
-                       command=contrast_callback, resolution=0.1, bg="#1f242d")
-#initially, color position set to 1
-contrastSlider.set(1)
-#setting the font style, font size, weight
-contrastSlider.configure(font=('poppins',11,'bold'),foreground='white')
-contrastSlider.place(x=1070,y=90)
-sharpnessSlider = Scale(mains, label="Sharpness", from_=0, to=2, orient=HORIZONTAL, length=200,
-                        command=sharpen_callback, resolution=0.1, bg="#1f242d")
-#initially, color position set to 1
-sharpnessSlider.set(1)
-#setting the font style, font size, weight
-sharpnessSlider.configure(font=('poppins',11,'bold'),foreground='white')
-sharpnessSlider.place(x=1070,y=165)
-
-# Color Slider
-#colorSlider stores the scale widget
-#Inside the widget,
-#sets the label next to the slider 
-#from_ = 0, to = 2 specifies the color range
-#length determines the length of the slider
-colorSlider = Scale(mains, label="Colors", from_=0, to=2, orient=HORIZONTAL, length=200,
-                    command=color_callback, resolution=0.1, bg="#1f242d")
-#initially, color position set to 1
-colorSlider.set(1)
-#setting the font style, font size, weight
-colorSlider.configure(font=('poppins',11,'bold'),foreground='white')
-colorSlider.place(x=1070,y=240)
-
-#rotate button
-#will be executed when the button is clicked
-btnRotate = Button(mains, text='Rotate', width=25, command=rotate, bg="#1f242d")
-btnRotate.configure(font=('poppins',11,'bold'),foreground='white')
-btnRotate.place(x=805,y=110)
-#reset button
-#reset_button stores the Button widget for reseting the image
-#Inside the widget,
-#setting the text displayed on the button
-reset_button=Button(mains,text="Reset",command=reset,bg="black",activebackground="ORANGE")
-reset_button.configure(font=('poppins',10,'bold'),foreground='white')
-reset_button.place(x=380,y=15)
-
-#Image changing button
-#btnchaImg stores the Button widget for changing the image
-btnChaImg = Button(mains, text='Change Image', width=25,command=ChangeImg,bg="#1f242d",activebackground="ORANGE")
-btnChaImg.configure(font=('poppins',11,'bold'),foreground='white')
-btnChaImg.place(x=805,y=35)
-
-#flip button
-#btnFlip stores the Button widget to flip the image
-#Inside the widget,
-btnFlip = Button(mains, text='Flip', width=25, command=flip, bg="#1f242d")
-btnFlip.configure(font=('poppins',11,'bold'),foreground='white')
-btnFlip.place(x=805,y=180)
-
-#resize button
-#btnResize stores the Button widget for resizing the image
-#Inside the widget,
-btnResize = Button(mains, text='Resize', width=25, command=resize, bg="#1f242d")
-btnResize.configure(font=('poppins',11,'bold'),foreground='white')
-btnResize.place(x=805,y=255)
-#setting the width of the button
-#adding the command that indicates the crop function
-btnCrop = Button(mains, text='Crop', width=25, command=crop, bg="#1f242d")
-btnCrop.configure(font=('poppins',11,'bold'),foreground='white')
-btnCrop.place(x=805,y=340)
-
-#Blur button
-#btnBlur stores the Button widget to blur the image
-btnBlur = Button(mains, text='Blur', width=25, command=blurr, bg="#1f242d")
-btnBlur.configure(font=('poppins',11,'bold'),foreground='white')
-btnBlur.place(x=805,y=425)
-
-#Emboss button
-#btnEmboss stores the Button widget for Embossing an image
-btnEmboss = Button(mains, text='Emboss', width=25, command=emboss, bg="#1f242d")
-btnEmboss.configure(font=('poppins',11,'bold'),foreground='white')
-btnEmboss.place(x=805,y=510)
-
-#Edge Enhance button
-#btnEdgeEnhance stores the Button widget for enhancing an image
-#Inside the widget,
-btnEdgeEnhance = Button(mains, text='EdgeEnhance', width=25, command=edgeEnhance, bg="#1f242d")
-btnEdgeEnhance.configure(font=('poppins',11,'bold'),foreground='white')
-btnEdgeEnhance.place(x=805,y=595)
-#adding the command that indicates the save function
-#will be executed when the button is clicked
-btnSave = Button(mains, text='Save', width=25, command=save, bg="black")
-btnSave.configure(font=('poppins',11,'bold'),foreground='white')
-btnSave.place(x=805,y=675)
-#adding the command that indicates the close function
-#will be executed when the button is clicked
-btnClose = Button(mains, text='Close', command=close, bg="black",activebackground="ORANGE")
-btnClose.configure(font=('poppins',10,'bold'),foreground='white')
-btnClose.place(x=430,y=15)
-
-mains.mainloop()
\ No newline at end of file
+# the window is only built when the editor is started, not when the file is
+# imported, e.g. by the worker processes of frames.frame_pool()
+if __name__ == "__main__":
+    # Creating the window for image editor
+    # Calling the TK
+    mains = Tk()
+
+    # Add an icon photo
+    photo_editor_icon = PhotoImage(file='photo_editor_icon.png')
+    mains.iconphoto(True,photo_editor_icon)
+
+    # creating a string of 215 space characters
+    space=(" ")*215
+    # It retrieves the screen width of the user's display
+    screen_width=mains.winfo_screenwidth()
+
+    # It retrieves the screen height of the user's display
+    screen_height = mains.winfo_screenheight()
+
+    #Using an f-string to construct the window size in the 
+    #format width x height
+    mains.geometry(f"{screen_width}x{screen_height}")
+    #setting the title for the window
+    mains.title(f"{space}Image Editor")
+    mains.configure(bg='#323946')
+    # the window's close button goes through close() as well
+    mains.protocol("WM_DELETE_WINDOW", close)
+
+
+    # Default image
+    img = Image.open("logo.png")
+    # "logo.png" image will be available after this code
+    # To run this code, this image must be saved in your PC's or you should change 
+    # the "logo.png" to your image name in this code.
+
+    # the panel shows at most 600 x 700 pixels, so edits are previewed on a
+    # copy scaled down to that size and img itself is only used when saving
+    PANEL_SIZE = (600, 700)
+    # every edit is recorded in the pipeline instead of overwriting img
+    pipeline = EditPipeline(img, PANEL_SIZE, proxy=open_preview("logo.png", PANEL_SIZE))
+    # undo / redo steps for the pipeline
+    history = EditHistory(pipeline)
+    panel = Label(mains)
+    panel.grid(row=0, column=0, rowspan=12, padx=50, pady=50)
+    # renders on a background thread and hands finished frames to displayimage
+    renderer = RenderWorker(mains, displayimage)
+    refresh()
+
+    #brightnessSlider stores the scale widget
+    #Inside the widget,
+
+    brightnessSlider = Scale(mains, label="Brightness", from_=0, to=2, orient=HORIZONTAL, length=200,
+                             resolution=0.1, command=brightness_callback, bg="#1f242d")
+    #initially, color position set to 1
+    brightnessSlider.set(1)
+    #setting the font style, font size, weight
+    brightnessSlider.configure(font=('poppins',11,'bold'),foreground='white')
+    brightnessSlider.place(x=1070,y=15)
+
+
+    #contrastSlider stores the scale widget
+    #length determines the length of the slider
+    contrastSlider = Scale(mains, label="Contrast", from_=0, to=2, orient=HORIZONTAL, length=200,
+                           command=contrast_callback, resolution=0.1, bg="#1f242d")
+    #initially, color position set to 1
+    contrastSlider.set(1)
+    #setting the font style, font size, weight
+    contrastSlider.configure(font=('poppins',11,'bold'),foreground='white')
+    contrastSlider.place(x=1070,y=90)
+    sharpnessSlider = Scale(mains, label="Sharpness", from_=0, to=2, orient=HORIZONTAL, length=200,
+                            command=sharpen_callback, resolution=0.1, bg="#1f242d")
+    #initially, color position set to 1
+    sharpnessSlider.set(1)
+    #setting the font style, font size, weight
+    sharpnessSlider.configure(font=('poppins',11,'bold'),foreground='white')
+    sharpnessSlider.place(x=1070,y=165)
+
+    # Color Slider
+    #colorSlider stores the scale widget
+    #Inside the widget,
+    #sets the label next to the slider 
+    #from_ = 0, to = 2 specifies the color range
+    #length determines the length of the slider
+    colorSlider = Scale(mains, label="Colors", from_=0, to=2, orient=HORIZONTAL, length=200,
+                        command=color_callback, resolution=0.1, bg="#1f242d")
+    #initially, color position set to 1
+    colorSlider.set(1)
+    #setting the font style, font size, weight
+    colorSlider.configure(font=('poppins',11,'bold'),foreground='white')
+    colorSlider.place(x=1070,y=240)
+
+    # Blur radius Slider
+    #blurSlider sets the radius used by the Blur button
+    blurSlider = Scale(mains, label="Blur Radius", from_=1, to=50, orient=HORIZONTAL, length=200,
+                       resolution=1, bg="#1f242d")
+    #initially, blur radius set to 2
+    blurSlider.set(2)
+    #setting the font style, font size, weight
+    blurSlider.configure(font=('poppins',11,'bold'),foreground='white')
+    blurSlider.place(x=1070,y=315)
+
+    #rotate button
+    #will be executed when the button is clicked
+    btnRotate = Button(mains, text='Rotate', width=25, command=rotate, bg="#1f242d")
+    btnRotate.configure(font=('poppins',11,'bold'),foreground='white')
+    btnRotate.place(x=805,y=110)
+    #reset button
+    #reset_button stores the Button widget for reseting the image
+    #Inside the widget,
+    #setting the text displayed on the button
+    reset_button=Button(mains,text="Reset",command=reset,bg="black",activebackground="ORANGE")
+    reset_button.configure(font=('poppins',10,'bold'),foreground='white')
+    reset_button.place(x=380,y=15)
+
+    #Image changing button
+    #btnchaImg stores the Button widget for changing the image
+    btnChaImg = Button(mains, text='Change Image', width=25,command=ChangeImg,bg="#1f242d",activebackground="ORANGE")
+    btnChaImg.configure(font=('poppins',11,'bold'),foreground='white')
+    btnChaImg.place(x=805,y=35)
+
+    #flip button
+    #btnFlip stores the Button widget to flip the image
+    #Inside the widget,
+    btnFlip = Button(mains, text='Flip', width=25, command=flip, bg="#1f242d")
+    btnFlip.configure(font=('poppins',11,'bold'),foreground='white')
+    btnFlip.place(x=805,y=180)
+
+    #resize button
+    #btnResize stores the Button widget for resizing the image
+    #Inside the widget,
+    btnResize = Button(mains, text='Resize', width=25, command=resize, bg="#1f242d")
+    btnResize.configure(font=('poppins',11,'bold'),foreground='white')
+    btnResize.place(x=805,y=255)
+    #setting the width of the button
+    #adding the command that indicates the crop function
+    btnCrop = Button(mains, text='Crop', width=25, command=crop, bg="#1f242d")
+    btnCrop.configure(font=('poppins',11,'bold'),foreground='white')
+    btnCrop.place(x=805,y=340)
+
+    #Blur button
+    #btnBlur stores the Button widget to blur the image
+    btnBlur = Button(mains, text='Blur', width=25, command=blurr, bg="#1f242d")
+    btnBlur.configure(font=('poppins',11,'bold'),foreground='white')
+    btnBlur.place(x=805,y=425)
+
+    #Emboss button
+    #btnEmboss stores the Button widget for Embossing an image
+    btnEmboss = Button(mains, text='Emboss', width=25, command=emboss, bg="#1f242d")
+    btnEmboss.configure(font=('poppins',11,'bold'),foreground='white')
+    btnEmboss.place(x=805,y=510)
+
+    #Edge Enhance button
+    #btnEdgeEnhance stores the Button widget for enhancing an image
+    #Inside the widget,
+    btnEdgeEnhance = Button(mains, text='EdgeEnhance', width=25, command=edgeEnhance, bg="#1f242d")
+    btnEdgeEnhance.configure(font=('poppins',11,'bold'),foreground='white')
+    btnEdgeEnhance.place(x=805,y=595)
+    #adding the command that indicates the save function
+    #will be executed when the button is clicked
+    btnSave = Button(mains, text='Save', width=25, command=save, bg="black")
+    btnSave.configure(font=('poppins',11,'bold'),foreground='white')
+    btnSave.place(x=805,y=675)
+    #progress bar for the background save, only shown while saving
+    saveProgress = ttk.Progressbar(mains, orient=HORIZONTAL, length=230, mode="determinate")
+    #adding the command that indicates the close function
+    #will be executed when the button is clicked
+    btnClose = Button(mains, text='Close', command=close, bg="black",activebackground="ORANGE")
+    btnClose.configure(font=('poppins',10,'bold'),foreground='white')
+    btnClose.place(x=430,y=15)
+
+    #undo and redo buttons, also on Ctrl+Z and Ctrl+Y
+    btnUndo = Button(mains, text='Undo', command=undo, bg="black",activebackground="ORANGE")
+    btnUndo.configure(font=('poppins',10,'bold'),foreground='white')
+    btnUndo.place(x=485,y=15)
+    btnRedo = Button(mains, text='Redo', command=redo, bg="black",activebackground="ORANGE")
+    btnRedo.configure(font=('poppins',10,'bold'),foreground='white')
+    btnRedo.place(x=537,y=15)
+    #exports the edits as a recipe for batch.py
+    btnRecipe = Button(mains, text='Recipe', command=export_recipe, bg="black",activebackground="ORANGE")
+    btnRecipe.configure(font=('poppins',10,'bold'),foreground='white')
+    btnRecipe.place(x=589,y=15)
+    mains.bind("<Control-z>", lambda e: undo())
+    mains.bind("<Control-y>", lambda e: redo())
+
+    mains.mainloop()
\ No newline at end of file
@@ -0,0 +1,168 @@
+# pipeline.py
+# Non-destructive edit pipeline for the photo editor.
+# The source image is never modified. Every edit is kept as a stage and the
+# result of each stage is kept as a checkpoint, so changing a stage only
+# re-renders the stages that come after it.
+# Checkpoints are keyed by the stages that produced them and are evicted,
+# least recently used first, once they go over a memory ceiling. A render
+# then replays from the nearest checkpoint that is left, which is what makes
+# undo, redo and reset cheap.
+# When a display size is given the interactive renders run on a proxy copy
+# scaled down to that size, and the full-resolution source is only rendered
+# by render_full(), e.g. when saving. A ready made proxy can be passed in
+# too, then the source is not even decoded until render_full().
+
+from collections import OrderedDict
+
+from PIL import Image
+
+import frames
+import operations
+
+# slider names, in the order of the sliders in the editor window
+ADJUSTMENTS = ("brightness", "contrast", "sharpness", "color")
+
+# default memory ceiling for the checkpoints, in bytes
+CACHE_BYTES = 256 * 1024 * 1024
+
+# brightness, contrast and color share one fused "adjust" stage
+# slider stages are always applied in this order, so the same slider values
+# give the same pixels however the sliders were reached; dragging the
+# sharpness slider re-renders one stage, the others two
+ADJUSTMENT_STAGE_ORDER = ("adjust", "sharpness")
+
+
+class EditPipeline:
+    def __init__(self, source, display_size=None, max_cache_bytes=CACHE_BYTES, proxy=None):
+        self.source = source
+        if proxy is None:
+            proxy = operations.editable(source)
+            if display_size:
+                proxy = make_proxy(proxy, display_size)
+        self.proxy = proxy
+        # how much bigger the source is than the proxy, used to replay the
+        # stages recorded on the proxy at full resolution
+        self.scale = (source.width / proxy.width, source.height / proxy.height)
+        # geometric operations and filters, in the order they were applied
+        self.ops = []
+        # slider values, applied on top of the ops
+        self.factors = dict.fromkeys(ADJUSTMENTS, 1.0)
+        # stage prefix -> rendered image, least recently used first
+        self._checkpoints = OrderedDict()
+        self._checkpoint_bytes = 0
+        self.max_cache_bytes = max_cache_bytes
+
+    # the full list of stages, as hashable (name, args) tuples
+    # slider stages that leave the image unchanged are skipped
+    def stages(self):
+        stages = list(self.ops)
+        for stage_name in ADJUSTMENT_STAGE_ORDER:
+            if stage_name == "adjust":
+                args = (self.factors["brightness"], self.factors["contrast"], self.factors["color"])
+            else:
+                args = (self.factors[stage_name],)
+            if any(factor != 1.0 for factor in args):
+                stages.append((stage_name, args))
+        return tuple(stages)
+
+    # sets a slider value
+    # while one slider is dragged only its own stage and the ones after it
+    # have to be re-rendered, everything before it comes from the checkpoints
+    # returns False when the slider already had that value
+    def set_adjustment(self, name, factor):
+        if name not in ADJUSTMENTS:
+            raise ValueError(f"unknown adjustment: {name}")
+        if self.factors[name] == float(factor):
+            return False
+        self.factors[name] = float(factor)
+        return True
+
+    # appends a geometric operation or filter, e.g. add_op("rotate")
+    def add_op(self, name, *args):
+        if name not in operations.OPERATIONS:
+            raise ValueError(f"unknown operation: {name}")
+        self.ops.append((name, args))
+
+    # drops every edit and goes back to the source image
+    # the checkpoints are kept, so undoing the reset is cheap too
+    def reset(self):
+        self.restore(((), dict.fromkeys(ADJUSTMENTS, 1.0)))
+
+    # the edit state, small enough to keep one for every undo step
+    def snapshot(self):
+        return (tuple(self.ops), dict(self.factors))
+
+    # goes back to a state returned by snapshot()
+    def restore(self, state):
+        ops, factors = state
+        self.ops = list(ops)
+        self.factors = dict(factors)
+
+    # renders the stages on the proxy, starting from the checkpoint of the
+    # longest run of leading stages that has already been rendered
+    def render(self, stages=None):
+        if stages is None:
+            stages = self.stages()
+        stages = tuple(stages)
+        start = len(stages)
+        while start and stages[:start] not in self._checkpoints:
+            start -= 1
+        if start:
+            img = self._checkpoints[stages[:start]]
+            self._checkpoints.move_to_end(stages[:start])
+        else:
+            img = self.proxy
+        for end in range(start + 1, len(stages) + 1):
+            img = operations.apply(img, stages[end - 1])
+            self._add_checkpoint(stages[:end], img)
+        return img
+
+    # keeps img as the checkpoint for stages, evicting the least recently
+    # used checkpoints while the total is over max_cache_bytes
+    def _add_checkpoint(self, stages, img):
+        self._checkpoints[stages] = img
+        self._checkpoint_bytes += image_bytes(img)
+        while self._checkpoint_bytes > self.max_cache_bytes and len(self._checkpoints) > 1:
+            _, evicted = self._checkpoints.popitem(last=False)
+            self._checkpoint_bytes -= image_bytes(evicted)
+
+    # replays the stages on the full-resolution source image
+    # nothing is cached, this only runs when the result is needed, e.g. on save
+    # progress(done) is called after each stage if given
+    def render_full(self, stages=None, progress=None):
+        if stages is None:
+            stages = self.stages()
+        sx, sy = self.scale
+        img = operations.editable(self.source)
+        for done, stage in enumerate(stages, 1):
+            img = operations.apply(img, operations.scale_stage(stage, sx, sy))
+            if progress:
+                progress(done)
+        return img
+
+    # like render_full(), but for every frame of an animated source
+    # map_func spreads the frames out, e.g. the map of frames.frame_pool()
+    # returns (frames, save options with the frame durations and loop count)
+    def render_frames(self, stages=None, map_func=map, progress=None):
+        if stages is None:
+            stages = self.stages()
+        sx, sy = self.scale
+        source_frames, options = frames.read_frames(self.source)
+        stages = [operations.scale_stage(stage, sx, sy) for stage in stages]
+        return frames.render_frames(source_frames, stages, map_func, progress), options
+
+
+# returns a copy of img that fits inside size, keeping the aspect ratio
+# images that already fit are returned as they are
+def make_proxy(img, size):
+    ratio = min(size[0] / img.width, size[1] / img.height)
+    if ratio >= 1:
+        return img
+    proxy_size = (max(1, round(img.width * ratio)), max(1, round(img.height * ratio)))
+    return img.resize(proxy_size, Image.LANCZOS, reducing_gap=3.0)
+
+
+# memory used by the pixels of img
+# PIL keeps single band images at 1 byte per pixel and the rest at 4
+def image_bytes(img):
+    return img.width * img.height * (1 if img.mode in ("1", "L", "P") else 4)
@@ -0,0 +1,142 @@
+# recipe.py
+# Edit recipes and the batch result cache.
+# A recipe is the list of pipeline stages written out as JSON, so the edits
+# made in the editor can be replayed on other images:
+#   {"version": 1, "stages": [["rotate"], ["adjust", 1.2, 1.0, 1.0]]}
+# The result cache keeps finished output files keyed by a hash of the input
+# file's bytes plus the recipe, so running the same recipe on the same
+# source again only copies a file. The cache is trimmed back to a size limit
+# by deleting the least recently used results.
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import operations
+
+RECIPE_VERSION = 1
+
+# where cached results are kept and how big the cache may get
+RESULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "photo_editor", "results")
+RESULT_BYTES = 2 * 1024 * 1024 * 1024
+
+
+# the recipe for a list of stages, as plain JSON data
+def to_recipe(stages):
+    return {"version": RECIPE_VERSION, "stages": [[name, *args] for name, args in stages]}
+
+
+# the stages of a recipe, as hashable (name, args) tuples
+# raises ValueError for unknown versions or operations and for data that is
+# not a recipe at all
+def from_recipe(data):
+    if not isinstance(data, dict):
+        raise ValueError("a recipe has to be a JSON object")
+    if data.get("version") != RECIPE_VERSION:
+        raise ValueError(f"unsupported recipe version: {data.get('version')}")
+    if not isinstance(data.get("stages"), list):
+        raise ValueError("recipe has no list of stages")
+    stages = []
+    for item in data["stages"]:
+        if not isinstance(item, list) or not item or not isinstance(item[0], str):
+            raise ValueError(f"not a recipe stage: {item!r}")
+        name, args = item[0], tuple(as_tuple(a) for a in item[1:])
+        if name != "adjust" and name not in operations.ENHANCERS and name not in operations.OPERATIONS:
+            raise ValueError(f"unknown operation in recipe: {name}")
+        stages.append((name, args))
+    return stages
+
+
+# JSON has no tuples, turns lists (e.g. crop boxes) back into tuples
+def as_tuple(value):
+    if isinstance(value, list):
+        return tuple(as_tuple(v) for v in value)
+    return value
+
+
+# the recipe as compact JSON with a fixed key order, used for hashing
+def recipe_json(stages):
+    return json.dumps(to_recipe(stages), sort_keys=True, separators=(",", ":"))
+
+
+# writes the recipe for stages to path
+def save_recipe(stages, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(to_recipe(stages), f, indent=2)
+
+
+# reads the stages from a recipe file
+def load_recipe(path):
+    with open(path, encoding="utf-8") as f:
+        return from_recipe(json.load(f))
+
+
+# sha256 of a file's bytes, read in blocks
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, directory=RESULT_DIR, max_bytes=RESULT_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    # cache key for running stages on the file src and saving as extension
+    # only the file's content counts, not its name or location
+    def key(self, src, stages, extension):
+        text = f"{file_hash(src)}|{recipe_json(stages)}|{extension.lower()}"
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key)
+
+    # copies the cached result for key to dst, returns False on a miss
+    def fetch(self, key, dst):
+        cached = self.path(key)
+        try:
+            shutil.copyfile(cached, dst)
+            # mark it as recently used for evict()
+            os.utime(cached)
+            return True
+        except OSError:
+            return False
+
+    # adds the finished file at path to the cache under key
+    # the copy is renamed into place, so readers never see half a file
+    def store(self, key, path):
+        fd, temp = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=self.directory)
+        os.close(fd)
+        try:
+            shutil.copyfile(path, temp)
+            os.replace(temp, self.path(key))
+        except OSError:
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+
+    # deletes the least recently used results until the cache fits max_bytes
+    def evict(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith("."):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
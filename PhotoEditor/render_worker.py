@@ -0,0 +1,79 @@
+# render_worker.py
+# Renders the edit pipeline on a background thread so the Tk mainloop never
+# waits for a render.
+# Only the latest request is kept: while a render is running, newer slider
+# positions replace each other and the stale ones are dropped. Finished
+# frames are picked up on the mainloop with after(), because Tk widgets may
+# only be touched from the thread running the mainloop.
+
+import threading
+
+
+class RenderWorker:
+    def __init__(self, root, on_frame, poll_ms=15):
+        self.root = root
+        # called on the mainloop with every finished frame
+        self.on_frame = on_frame
+        self.poll_ms = poll_ms
+        self._cond = threading.Condition()
+        # (pipeline, stages) waiting for the worker, only the newest is kept
+        self._pending = None
+        # rendered frame (or the exception raised) waiting for the mainloop
+        self._done = None
+        self._rendering = False
+        self._polling = False
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    # asks for the current state of pipeline to be rendered
+    # replaces any request the worker has not started yet
+    def submit(self, pipeline):
+        with self._cond:
+            self._pending = (pipeline, pipeline.stages())
+            self._cond.notify()
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    # stops the worker thread once the current render is finished
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._pending = None
+            self._cond.notify()
+
+    # worker thread: renders the newest request, forever
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                pipeline, stages = self._pending
+                self._pending = None
+                self._rendering = True
+            try:
+                result = pipeline.render(stages)
+            except Exception as e:
+                result = e
+            with self._cond:
+                self._done = result
+                self._rendering = False
+
+    # mainloop: shows the finished frame and keeps polling while work is left
+    def _poll(self):
+        with self._cond:
+            result = self._done
+            self._done = None
+            busy = self._pending is not None or self._rendering
+        if busy and not self._stopped:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+        if isinstance(result, Exception):
+            # re-raised here so Tk reports it like any other callback error
+            raise result
+        if result is not None:
+            self.on_frame(result)
@@ -0,0 +1,119 @@
+# saver.py
+# Saving for the photo editor.
+# The full resolution render and the encoding run on a background thread,
+# and the file is written to a temporary file next to the target that is
+# renamed over it at the end, so a crash or a full disk never leaves a half
+# written image behind.
+# Animated sources saved as GIF, WebP, PNG or TIFF keep all their frames,
+# see frames.py.
+
+import os
+import queue
+import tempfile
+import threading
+
+from PIL import Image
+
+import frames
+
+# formats the save dialog offers, with their default encoder options
+FORMATS = {
+    "JPEG": {"quality": 90, "progressive": False, "optimize": False},
+    "PNG": {"compress_level": 6, "optimize": False},
+    "WEBP": {"quality": 90, "lossless": False},
+}
+
+
+# PIL format name for a file name, e.g. "photo.jpg" -> "JPEG"
+# returns None when the extension is unknown
+def format_for(path):
+    return Image.registered_extensions().get(os.path.splitext(path)[1].lower())
+
+
+# encoder options for fmt, the defaults updated with the given ones
+# options the format does not know about are dropped
+def encoder_options(fmt, **options):
+    defaults = FORMATS.get(fmt, {})
+    result = dict(defaults)
+    result.update((k, v) for k, v in options.items() if k in defaults)
+    return result
+
+
+# writes img to path through a temporary file in the same folder
+# the old file, if any, is only replaced once the new one is complete
+def save_atomic(img, path, fmt=None, **options):
+    fmt = fmt or format_for(path)
+    if fmt is None:
+        raise ValueError(f"unknown file extension: {path}")
+    if fmt == "JPEG" and img.mode not in ("L", "RGB"):
+        img = img.convert("RGB")
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            img.save(f, fmt, **options)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp makes the file private, give it the usual permissions
+        os.chmod(temp, os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644)
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        raise
+
+
+# renders pipeline at full resolution and saves it on a background thread
+# on_progress(done, total) and on_done(error or None) are called on the
+# Tk mainloop, which polls the thread with after()
+class BackgroundSave:
+    def __init__(self, root, pipeline, path, options, on_progress, on_done, poll_ms=50):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self._events = queue.Queue()
+        # the edit state is taken now, later edits do not end up in this file
+        stages = pipeline.stages()
+        self._thread = threading.Thread(target=self._run, args=(pipeline, stages, path, options), daemon=True)
+        self._thread.start()
+        self.root.after(self.poll_ms, self._poll)
+
+    # True until the file is written or the save failed
+    def running(self):
+        return self._thread.is_alive()
+
+    # worker thread: one progress step per stage, one for the encoding
+    def _run(self, pipeline, stages, path, options):
+        total = len(stages) + 1
+        progress = lambda done: self._events.put(("progress", done, total))
+        try:
+            fmt = options.get("fmt") or format_for(path)
+            if frames.is_animated(pipeline.source) and fmt in frames.MULTI_FRAME_FORMATS:
+                with frames.frame_pool() as pool:
+                    rendered, frame_options = pipeline.render_frames(stages, pool.map, progress)
+                img = rendered[0]
+                options = dict(options, **frames.save_frames_options(rendered, fmt, frame_options))
+            else:
+                img = pipeline.render_full(stages, progress=progress)
+            save_atomic(img, path, **options)
+            self._events.put(("progress", total, total))
+            self._events.put(("done", None))
+        except Exception as e:
+            self._events.put(("done", e))
+
+    # mainloop: passes the events on until the save is done
+    def _poll(self):
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "progress":
+                self.on_progress(event[1], event[2])
+            else:
+                self.on_done(event[1])
+                return
+        self.root.after(self.poll_ms, self._poll)
@@ -0,0 +1,107 @@
+# tiles.py
+# Tiled filter engine for very large images.
+# img.filter() works on the whole image at once. filter_tiled() instead
+# walks the image in bands of rows, cuts each band into tiles and filters the
+# tiles on a thread pool. Every tile is cut with a halo of extra pixels on
+# each side, as wide as the filter reaches, so the result is exactly the
+# same as filtering the whole image.
+# Only a few bands are held at a time, one more for every tile_size rows
+# of halo. With in_place=True the result is
+# written back into the image itself, so the extra memory stays at a few
+# bands however large the image is.
+
+import math
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageFilter
+
+# edge length of a tile in pixels
+TILE_SIZE = 512
+
+# threads used to filter tiles, batch workers set this to 1
+WORKERS = os.cpu_count() or 1
+
+
+# how many pixels around a pixel the filter reads, or None if unknown
+def filter_halo(filt):
+    if isinstance(filt, ImageFilter.BuiltinFilter):
+        width, height = filt.filterargs[0]
+        return max(width, height) // 2
+    if isinstance(filt, (ImageFilter.RankFilter, ImageFilter.ModeFilter)):
+        return filt.size // 2
+    if isinstance(filt, (ImageFilter.GaussianBlur, ImageFilter.UnsharpMask)):
+        # PIL runs three box blurs, each reaching at most radius + 1 pixels
+        return 3 * (math.ceil(max_radius(filt.radius)) + 2)
+    if isinstance(filt, ImageFilter.BoxBlur):
+        return math.ceil(max_radius(filt.radius)) + 2
+    return None
+
+
+# GaussianBlur and BoxBlur accept a single radius or an (x, y) pair
+def max_radius(radius):
+    if isinstance(radius, (tuple, list)):
+        return max(radius)
+    return radius
+
+
+# filters img tile by tile, giving the same pixels as img.filter(filt)
+# in_place=True writes the result into img itself and returns it
+def filter_tiled(img, filt, tile_size=TILE_SIZE, workers=None, in_place=False):
+    if isinstance(filt, type):
+        filt = filt()
+    halo = filter_halo(filt)
+    if halo is not None:
+        # every tile filters its halo as well; tiles at least 8 halos wide
+        # keep that overhead under 1.6x, so a large blur radius costs about
+        # what img.filter() costs instead of growing with the radius
+        tile_size = max(tile_size, 8 * halo)
+    if halo is None or (img.width <= tile_size and img.height <= tile_size):
+        # nothing to gain from tiles, filter the whole image
+        result = img.filter(filt)
+        if in_place:
+            img.paste(result)
+            return img
+        return result
+
+    width, height = img.size
+    out = img if in_place else Image.new(img.mode, img.size)
+    columns = range(0, width, tile_size)
+    # filtered bands not written back yet, as (bottom row, tiles)
+    pending = deque()
+    with ThreadPoolExecutor(workers or WORKERS) as pool:
+        for top in range(0, height, tile_size):
+            bottom = min(height, top + tile_size)
+            band_top = max(0, top - halo)
+            # a filtered band is written back only once no band still to
+            # come reads its rows; with a halo wider than a tile that is
+            # more than one band later
+            while pending and pending[0][0] <= band_top:
+                paste_tiles(out, pending.popleft()[1])
+            band = img.crop((0, band_top, width, min(height, bottom + halo)))
+            pending.append((bottom, list(pool.map(
+                lambda left: filter_tile(band, band_top, filt, halo, left, top, min(width, left + tile_size), bottom),
+                columns,
+            ))))
+        for _, done in pending:
+            paste_tiles(out, done)
+    return out
+
+
+# filters one tile of a band and cuts the halo off again
+# returns ((left, top), filtered tile)
+def filter_tile(band, band_top, filt, halo, left, top, right, bottom):
+    # the tile rows, counted from the top of the band
+    top -= band_top
+    bottom -= band_top
+    box = (max(0, left - halo), max(0, top - halo), min(band.width, right + halo), min(band.height, bottom + halo))
+    tile = band.crop(box).filter(filt)
+    inner = (left - box[0], top - box[1], right - box[0], bottom - box[1])
+    return (left, top + band_top), tile.crop(inner)
+
+
+# pastes ((left, top), tile) pairs into out
+def paste_tiles(out, tiles):
+    for position, tile in tiles:
+        out.paste(tile, position)